@@ -3,71 +3,272 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import click
 from flask import Flask, send_from_directory
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from src.models.database import db
-from src.routes.auth import auth_bp
-from src.routes.survey import survey_bp
-from src.routes.dashboard import dashboard_bp
-from src.routes.reports import reports_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'powercars-secret-key-2025'
-app.config['JWT_SECRET_KEY'] = 'powercars-jwt-secret-2025'
-
-# Configurar CORS para permitir requests desde cualquier origen
-CORS(app, origins="*")
-
-# Configurar JWT
-jwt = JWTManager(app)
-
-# Registrar blueprints
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(survey_bp, url_prefix='/api/survey')
-app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
-app.register_blueprint(reports_bp, url_prefix='/api/reports')
-
-# Configurar base de datos
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-with app.app_context():
-    db.create_all()
-    # Crear usuario administrador por defecto
+from flask.cli import with_appcontext
+
+# Presupuesto de arranque en frío (ms) verificado por `flask check-startup`
+STARTUP_IMPORT_BUDGET_MS = 1500
+STARTUP_FIRST_REQUEST_BUDGET_MS = 500
+
+def create_app(config=None):
+    """Crear la aplicación Flask sin tocar la base de datos
+
+    El esquema y los datos iniciales se crean con `flask --app src.main init-db`.
+    """
+    # Imports diferidos: importar este módulo no carga extensiones ni rutas
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from src.models.database import init_database
+    from src.services.result_cache import result_cache
+    from src.services.compression import init_compression
+    from src.services.json_provider import init_json_provider
+    from src.services.user_cache import register_user_loader
+    from src.routes.auth import auth_bp
+    from src.routes.survey import survey_bp
+    from src.routes.dashboard import dashboard_bp
+    from src.routes.reports import reports_bp
+    
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'powercars-secret-key-2025'
+    app.config['JWT_SECRET_KEY'] = 'powercars-jwt-secret-2025'
+    
+    # Configurar base de datos
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    if config:
+        app.config.from_mapping(config)
+    
+    # Serialización JSON de todas las respuestas (orjson si está disponible)
+    init_json_provider(app)
+    
+    # Configurar CORS para permitir requests desde cualquier origen
+    CORS(app, origins="*")
+    
+    # Configurar JWT; current_user se resuelve desde el cache de usuarios
+    register_user_loader(JWTManager(app))
+    
+    # Registrar blueprints
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(survey_bp, url_prefix='/api/survey')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(reports_bp, url_prefix='/api/reports')
+    
+    init_database(app)
+    result_cache.init_app(app)
+    init_compression(app)
+    
+    for command in (init_db_command, provision_template_command, rebuild_aggregates_command,
+                    build_snapshot_command, reclassify_impediments_command, rebuild_search_index_command,
+                    rebuild_satisfaction_rollups_command, check_startup_command, benchmark_json_command):
+        app.cli.add_command(command)
+    
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+            return "Static folder not configured", 404
+        
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
+        else:
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+    
+    return app
+
+def init_db():
+    """Crear el esquema, aplicar migraciones y cargar los datos iniciales (idempotente)"""
+    from src.models.database import db, database_file_lock
+    from src.models.migrations import run_migrations
+    from src.services.template_provisioning import provision_template
+    from src.services.export_jobs import fail_stale_jobs
+    
+    # Varios workers o despliegues simultáneos se serializan: solo el primero crea y siembra
+    with database_file_lock():
+        db.create_all()
+        run_migrations()
+        create_admin_user()
+        # Solo siembra si no hay plantilla activa: no reemplaza una versión publicada con provision-template
+        provision_template(seed=True)
+        # Los trabajos que quedaron en cola o en curso al detenerse los workers ya no terminarán
+        fail_stale_jobs()
+
+def create_admin_user():
+    """Crear el usuario administrador por defecto si no existe"""
+    from sqlalchemy.exc import IntegrityError
+    from src.models.database import db
     from src.models.user import User
-    from werkzeug.security import generate_password_hash
-    
-    admin_user = User.query.filter_by(username='admin').first()
-    if not admin_user:
-        admin_user = User(
-            username='admin',
-            email='admin@powercars.com',
-            password_hash=generate_password_hash('admin123'),
-            role='admin',
-            full_name='Administrador PowerCars'
-        )
-        db.session.add(admin_user)
+    from src.services.password_hashing import hash_password
+    
+    if User.query.filter_by(username='admin').first():
+        return
+    
+    db.session.add(User(
+        username='admin',
+        email='admin@powercars.com',
+        password_hash=hash_password('admin123'),
+        role='admin',
+        full_name='Administrador PowerCars'
+    ))
+    try:
         db.session.commit()
         print("Usuario administrador creado: admin / admin123")
+    except IntegrityError:
+        # Otro proceso lo creó al mismo tiempo
+        db.session.rollback()
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Crear el esquema, aplicar migraciones y cargar los datos iniciales"""
+    init_db()
+    print("Base de datos inicializada")
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+@click.command('provision-template')
+@click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False), help='Archivo JSON de la plantilla')
+@with_appcontext
+def provision_template_command(path):
+    """Cargar la plantilla de encuesta desde su archivo declarativo (idempotente por título y versión)"""
+    from src.models.database import database_file_lock
+    from src.services.template_provisioning import provision_template
+    with database_file_lock():
+        template, created = provision_template(path)
+    if created:
+        print(f"Plantilla creada: {template.title} v{template.version} (id {template.id})")
     else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+        print(f"Plantilla activa: {template.title} v{template.version} (id {template.id}), sin crear una nueva")
+
+@click.command('rebuild-aggregates')
+@with_appcontext
+def rebuild_aggregates_command():
+    """Regenerar las tablas de agregados del dashboard desde los datos crudos"""
+    from src.services.aggregates import rebuild_aggregates
+    rebuild_aggregates()
+    print("Agregados regenerados")
+
+@click.command('build-snapshot')
+@click.option('--full', is_flag=True, help='Reconstruir desde cero en lugar de refrescar incrementalmente')
+@with_appcontext
+def build_snapshot_command(full):
+    """Construir o refrescar el snapshot columnar de respuestas completadas"""
+    from src.services.snapshot import snapshot_store, get_snapshot_path
+    snapshot = snapshot_store.refresh(get_snapshot_path(), full=full)
+    print(f"Snapshot actualizado: {snapshot.rows} respuestas, {len(snapshot.columns)} preguntas")
+
+@click.command('reclassify-impediments')
+@click.option('--batch-size', default=500, help='Respuestas actualizadas por transacción')
+@with_appcontext
+def reclassify_impediments_command(batch_size):
+    """Reclasificar los impedimentos guardados con las reglas vigentes"""
+    from src.services.impediment_classifier import reclassify_answers
+    from src.services.question_registry import question_registry
+    question_id = question_registry.load().get('impediment_details')
+    if not question_id:
+        print("No existe la pregunta de detalle de impedimentos")
+        return
+    updated = reclassify_answers(question_id, batch_size=batch_size)
+    print(f"Respuestas reclasificadas: {updated}")
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Reconstruir el índice de búsqueda de respuestas de texto libre"""
+    from src.services.answer_search import rebuild_search_index
+    rebuild_search_index()
+    print("Índice de búsqueda reconstruido")
+
+@click.command('rebuild-satisfaction-rollups')
+@click.option('--batch-size', default=1000, help='Filas leídas por lote del historial')
+@with_appcontext
+def rebuild_satisfaction_rollups_command(batch_size):
+    """Regenerar los buckets de tendencias de satisfacción desde el historial"""
+    from src.services.satisfaction_trends import rebuild_satisfaction_rollups
+    buckets = rebuild_satisfaction_rollups(batch_size=batch_size)
+    print(f"Buckets de satisfacción regenerados: {buckets}")
+
+# Se ejecuta en un intérprete nuevo para medir el arranque en frío real
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from src.main import create_app
+app = create_app()
+imported = time.perf_counter()
+app.test_client().get('/api/survey/template')
+first_request = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_request_ms': (first_request - imported) * 1000}))
+"""
+
+@click.command('check-startup')
+@click.option('--import-budget-ms', default=STARTUP_IMPORT_BUDGET_MS, help='Máximo para importar y crear la app')
+@click.option('--request-budget-ms', default=STARTUP_FIRST_REQUEST_BUDGET_MS, help='Máximo para la primera petición')
+def check_startup_command(import_budget_ms, request_budget_ms):
+    """Medir el arranque en frío y fallar si supera el presupuesto"""
+    import json
+    import subprocess
+    
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_PROBE, backend_dir],
+        check=True, capture_output=True, text=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    
+    print(f"Importación y creación de la app: {timings['import_ms']:.0f} ms (presupuesto {import_budget_ms} ms)")
+    print(f"Primera petición: {timings['first_request_ms']:.0f} ms (presupuesto {request_budget_ms} ms)")
+    if timings['import_ms'] > import_budget_ms or timings['first_request_ms'] > request_budget_ms:
+        raise click.ClickException("El arranque supera el presupuesto")
+
+@click.command('benchmark-json')
+@click.option('--rows', default=10000, help='Filas de la exportación simulada')
+@click.option('--repeat', default=5, help='Repeticiones por medición (se informa la mejor)')
+@with_appcontext
+def benchmark_json_command(rows, repeat):
+    """Comparar el tiempo de codificar los payloads de exportación y plantilla con cada proveedor JSON"""
+    from datetime import datetime, timedelta
+    from flask import current_app
+    from src.models.user import SurveyTemplate, Question
+    from src.services.json_provider import benchmark_json_providers
+    
+    # Exportación simulada con la forma de /api/reports/responses (objetos y filas)
+    started = datetime(2025, 1, 1, 8, 30)
+    export_rows = [
+        (i, 'Mecánica', '1-3 años', started + timedelta(minutes=i), i % 7 == 0, f'Empleado {i}')
+        for i in range(1, rows + 1)
+    ]
+    names = ['id', 'area', 'experience', 'completed_at', 'is_anonymous', 'name']
+    payloads = {
+        'export (objetos)': {'responses': [dict(zip(names, row)) for row in export_rows], 'next_cursor': None},
+        'export (filas)': {'columns': names, 'rows': export_rows, 'next_cursor': None},
+    }
+    
+    template = SurveyTemplate.query.filter_by(is_active=True).first()
+    if template:
+        questions = Question.query.filter_by(survey_template_id=template.id).order_by(Question.order_index).all()
+        sections = {}
+        for question in questions:
+            sections.setdefault(question.section_name, []).append(question.to_dict())
+        payloads['plantilla'] = {
+            'id': template.id,
+            'title': template.title,
+            'sections': [{'name': name, 'questions': section} for name, section in sections.items()]
+        }
+    
+    results = benchmark_json_providers(current_app._get_current_object(), payloads, repeat=repeat)
+    for payload_name, timings in results.items():
+        line = ', '.join(f'{provider} {ms:.2f} ms' for provider, ms in timings.items())
+        if 'orjson' in timings:
+            line += f" ({timings['stdlib'] / timings['orjson']:.1f}x)"
+        print(f'{payload_name}: {line}')
 
 if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        init_db()
     app.run(host='0.0.0.0', port=5001, debug=True)
-
@@ -1,4 +1,119 @@
+import os
+from contextlib import contextmanager
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
 
 db = SQLAlchemy()
 
+# Clave del bind de solo lectura en SQLALCHEMY_BINDS
+READONLY_BIND = 'readonly'
+
+# Valores por defecto de la configuración de SQLite; se sobrescriben con app.config
+SQLITE_DEFAULTS = {
+    'SQLITE_BUSY_TIMEOUT': 5000,        # ms que una conexión espera un lock antes de fallar
+    'SQLITE_SYNCHRONOUS': 'NORMAL',     # seguro con WAL, evita un fsync por commit
+    'SQLITE_CACHE_SIZE': -20000,        # negativo = KiB de caché de páginas por conexión
+    'SQLITE_MMAP_SIZE': 268435456,      # bytes de la base leídos vía mmap
+    'SQLITE_FOREIGN_KEYS': True,
+    'SQLITE_BEGIN_MODE': 'IMMEDIATE',   # BEGIN implícito del driver antes de la primera escritura
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_TIMEOUT': 30,
+    'DB_POOL_RECYCLE': 3600,
+}
+
+def init_database(app):
+    """Configurar los engines SQLite (principal y de solo lectura) y registrar la extensión"""
+    for key, value in SQLITE_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    file_database = url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+    if file_database:
+        app.config.setdefault('SQLALCHEMY_BINDS', {
+            READONLY_BIND: f"sqlite:///file:{url.database}?mode=ro&uri=true"
+        })
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
+    db.init_app(app)
+    
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name == 'sqlite':
+                configure_sqlite_engine(engine, app.config, readonly=bind_key == READONLY_BIND)
+
+def engine_options(config):
+    """Opciones del pool de conexiones para una base SQLite en archivo"""
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+        'connect_args': {
+            # El driver espera en segundos; el PRAGMA busy_timeout fija el valor efectivo
+            'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000,
+            'check_same_thread': False,
+            # Las lecturas van sin transacción; la primera escritura abre BEGIN IMMEDIATE y toma
+            # el lock esperando busy_timeout, sin el SQLITE_BUSY de promover una lectura a escritura
+            'isolation_level': config['SQLITE_BEGIN_MODE'],
+        },
+    }
+
+def configure_sqlite_engine(engine, config, readonly=False):
+    """Aplicar los PRAGMA en cada conexión nueva del engine"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA foreign_keys = {'ON' if config['SQLITE_FOREIGN_KEYS'] else 'OFF'}",
+    ]
+    if readonly:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL es persistente en el archivo: lectores y escritor ya no se bloquean entre sí
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def read_engine():
+    """Engine de solo lectura si está configurado, si no el principal"""
+    return db.engines.get(READONLY_BIND, db.engine)
+
+@contextmanager
+def read_session():
+    """Sesión sobre el engine de solo lectura para lecturas largas (exportaciones)"""
+    session = Session(bind=read_engine())
+    try:
+        yield session
+    finally:
+        session.close()
+
+@contextmanager
+def database_file_lock(suffix='.init.lock'):
+    """Lock exclusivo entre procesos junto al archivo de la base (inicialización y aprovisionamiento)"""
+    try:
+        import fcntl
+    except ImportError:
+        # Sin fcntl (Windows) no hay lock entre procesos; el servidor de desarrollo es un solo proceso
+        fcntl = None
+    
+    database = db.engine.url.database
+    if fcntl is None or not database or database == ':memory:':
+        yield
+        return
+    
+    with open(os.path.abspath(database) + suffix, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,147 @@
+from datetime import datetime
+from sqlalchemy import text
+from src.models.database import db
+
+def migrate_question_answers_unique():
+    """Deduplicar respuestas por (respuesta, pregunta) y crear el índice único compuesto"""
+    # Conservar la respuesta más reciente de cada par
+    db.session.execute(text("""
+        DELETE FROM question_answers
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM question_answers
+            GROUP BY survey_response_id, question_id
+        )
+    """))
+    db.session.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_question_answers_response_question
+        ON question_answers (survey_response_id, question_id)
+    """))
+
+# Patrones usados para asignar claves a preguntas creadas antes de existir question_key
+LEGACY_QUESTION_KEY_PATTERNS = [
+    ('full_name', '%nombre completo%'),
+    ('area', '%área trabajas%'),
+    ('tenure', '%tiempo llevas trabajando%'),
+    ('role', '%rol específico%'),
+    ('supervisor', '%líder directo%'),
+    ('daily_duties', '%funciones diarias%'),
+    ('has_impediment', '%algún impedimento%'),
+    ('impediment_details', '%especifica cuáles%'),
+    ('protocols_improvable', '%mejorar los protocolos%'),
+    ('work_environment', '%ambiente laboral%'),
+    ('feels_valued', '%sientes valorado%'),
+    ('peer_communication', '%comunicación entre compañeros%'),
+    ('work_schedule', '%horarios de trabajo%'),
+    ('tools_access', '%herramientas necesarias%'),
+    ('overall_experience', '%escala del 1 al 10%'),
+    ('likes_most', '%más te gusta%'),
+    ('improvement_ideas', '%ideas específicas%'),
+    ('additional_comments', '%comentarios adicionales%'),
+]
+
+def migrate_question_keys():
+    """Agregar la columna question_key y completarla en preguntas existentes"""
+    columns = {row[1] for row in db.session.execute(text("PRAGMA table_info(questions)"))}
+    if 'question_key' not in columns:
+        db.session.execute(text("ALTER TABLE questions ADD COLUMN question_key VARCHAR(50)"))
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_questions_template_key
+        ON questions (survey_template_id, question_key)
+    """))
+    for key, pattern in LEGACY_QUESTION_KEY_PATTERNS:
+        db.session.execute(
+            text("UPDATE questions SET question_key = :key WHERE question_key IS NULL AND question_text LIKE :pattern"),
+            {'key': key, 'pattern': pattern}
+        )
+
+def migrate_answer_aggregates():
+    """Poblar las tablas de agregados para bases creadas antes de existir"""
+    from src.services.aggregates import rebuild_aggregates
+    rebuild_aggregates()
+
+def migrate_question_answers_question_index():
+    """Índice por pregunta para recorrer las respuestas de una pregunta en los self-joins"""
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_question_answers_question_response
+        ON question_answers (question_id, survey_response_id)
+    """))
+
+def migrate_impediment_categories():
+    """Agregar answer_category, cargar las reglas iniciales y clasificar los impedimentos existentes"""
+    from src.services.impediment_classifier import seed_default_rules, reclassify_answers
+    from src.services.question_registry import question_registry
+    
+    columns = {row[1] for row in db.session.execute(text("PRAGMA table_info(question_answers)"))}
+    if 'answer_category' not in columns:
+        db.session.execute(text("ALTER TABLE question_answers ADD COLUMN answer_category VARCHAR(100)"))
+    seed_default_rules()
+    db.session.commit()
+    
+    question_id = question_registry.load().get('impediment_details')
+    if question_id:
+        reclassify_answers(question_id)
+
+def migrate_answer_search():
+    """Crear el índice FTS5 de respuestas de texto libre y poblarlo con las respuestas existentes"""
+    from src.services.answer_search import rebuild_search_index
+    
+    rebuild_search_index()
+
+def migrate_survey_responses_status_completed_index():
+    """Índice compuesto para filtrar encuestas completadas por rango de fechas"""
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_survey_responses_status_completed
+        ON survey_responses (status, completed_at)
+    """))
+
+def migrate_satisfaction_rollups():
+    """Poblar los buckets de tendencias de satisfacción con el historial de encuestas completadas"""
+    from src.services.satisfaction_trends import rebuild_satisfaction_rollups
+    
+    rebuild_satisfaction_rollups()
+
+def migrate_survey_responses_keyset_indexes():
+    """Índices para recorrer las encuestas completadas por rango de id sin ordenar en memoria"""
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_survey_responses_status_id
+        ON survey_responses (status, id)
+    """))
+    db.session.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_survey_responses_status_area_id
+        ON survey_responses (status, employee_area, id)
+    """))
+
+# Migraciones en orden de aplicación; cada una debe ser idempotente
+MIGRATIONS = [
+    ('0001_question_answers_unique', migrate_question_answers_unique),
+    ('0002_question_keys', migrate_question_keys),
+    ('0003_answer_aggregates', migrate_answer_aggregates),
+    ('0004_question_answers_question_index', migrate_question_answers_question_index),
+    ('0005_impediment_categories', migrate_impediment_categories),
+    ('0006_answer_search', migrate_answer_search),
+    ('0007_survey_responses_status_completed_index', migrate_survey_responses_status_completed_index),
+    ('0008_satisfaction_rollups', migrate_satisfaction_rollups),
+    ('0009_survey_responses_keyset_indexes', migrate_survey_responses_keyset_indexes),
+]
+
+def run_migrations():
+    """Aplicar sobre la base existente las migraciones que aún no se registraron"""
+    db.session.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(100) PRIMARY KEY,
+            applied_at DATETIME
+        )
+    """))
+    applied = {row[0] for row in db.session.execute(text("SELECT name FROM schema_migrations"))}
+    
+    for name, migration in MIGRATIONS:
+        if name in applied:
+            continue
+        migration()
+        db.session.execute(
+            text("INSERT OR IGNORE INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+            {'name': name, 'applied_at': datetime.utcnow()}
+        )
+        db.session.commit()
+    
+    db.session.commit()
@@ -22,7 +22,7 @@ class User(db.Model):
             'role': self.role,
             'full_name': self.full_name,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class SurveyTemplate(db.Model):
@@ -42,9 +42,13 @@ class SurveyTemplate(db.Model):
 
 class Question(db.Model):
     __tablename__ = 'questions'
+    __table_args__ = (
+        db.Index('idx_questions_template_key', 'survey_template_id', 'question_key'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     survey_template_id = db.Column(db.Integer, db.ForeignKey('survey_templates.id'), nullable=False)
+    question_key = db.Column(db.String(50))  # Código semántico estable, independiente del texto
     section_name = db.Column(db.String(100), nullable=False)
     question_text = db.Column(db.Text, nullable=False)
     question_type = db.Column(db.String(50), nullable=False)  # text, textarea, select, radio, checkbox, scale
@@ -59,6 +63,7 @@ class Question(db.Model):
     def to_dict(self):
         return {
             'id': self.id,
+            'question_key': self.question_key,
             'section_name': self.section_name,
             'question_text': self.question_text,
             'question_type': self.question_type,
@@ -70,6 +75,12 @@ class Question(db.Model):
 
 class SurveyResponse(db.Model):
     __tablename__ = 'survey_responses'
+    __table_args__ = (
+        db.Index('idx_survey_responses_status_completed', 'status', 'completed_at'),
+        # Paginación por cursor (id) de la exportación, con y sin filtro de área
+        db.Index('idx_survey_responses_status_id', 'status', 'id'),
+        db.Index('idx_survey_responses_status_area_id', 'status', 'employee_area', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     survey_template_id = db.Column(db.Integer, db.ForeignKey('survey_templates.id'), nullable=False)
@@ -92,13 +103,17 @@ class SurveyResponse(db.Model):
             'employee_area': self.employee_area,
             'work_experience': self.work_experience,
             'is_anonymous': self.is_anonymous,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'started_at': self.started_at,
+            'completed_at': self.completed_at,
             'status': self.status
         }
 
 class QuestionAnswer(db.Model):
     __tablename__ = 'question_answers'
+    __table_args__ = (
+        db.Index('uq_question_answers_response_question', 'survey_response_id', 'question_id', unique=True),
+        db.Index('idx_question_answers_question_response', 'question_id', 'survey_response_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     survey_response_id = db.Column(db.Integer, db.ForeignKey('survey_responses.id'), nullable=False)
@@ -106,6 +121,7 @@ class QuestionAnswer(db.Model):
     answer_text = db.Column(db.Text)
     answer_numeric = db.Column(db.Integer)
     answer_json = db.Column(db.JSON)  # Para respuestas complejas
+    answer_category = db.Column(db.String(100))  # Categoría asignada al guardar (impedimentos)
     answered_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def to_dict(self):
@@ -115,6 +131,98 @@ class QuestionAnswer(db.Model):
             'answer_text': self.answer_text,
             'answer_numeric': self.answer_numeric,
             'answer_json': self.answer_json,
-            'answered_at': self.answered_at.isoformat() if self.answered_at else None
+            'answered_at': self.answered_at
         }
 
+
+class AnswerAggregate(db.Model):
+    __tablename__ = 'answer_aggregates'
+    __table_args__ = (
+        db.Index('uq_answer_aggregates_key', 'template_id', 'question_id', 'answer_value', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    template_id = db.Column(db.Integer, db.ForeignKey('survey_templates.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    answer_value = db.Column(db.Text, nullable=False)
+    total_count = db.Column(db.Integer, nullable=False, default=0)  # Respuestas con este valor
+    completed_count = db.Column(db.Integer, nullable=False, default=0)  # Solo encuestas completadas
+
+class ResponseAggregate(db.Model):
+    __tablename__ = 'response_aggregates'
+    
+    template_id = db.Column(db.Integer, db.ForeignKey('survey_templates.id'), primary_key=True)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+
+class SatisfactionRollup(db.Model):
+    __tablename__ = 'satisfaction_rollups'
+    __table_args__ = (
+        db.Index('uq_satisfaction_rollups_bucket', 'granularity', 'question_key', 'bucket_start', 'area', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # day, week, month
+    bucket_start = db.Column(db.Date, nullable=False)  # Día, lunes o primer día del mes (por completed_at)
+    area = db.Column(db.String(100), nullable=False)
+    question_key = db.Column(db.String(50), nullable=False)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)  # Se incrementa con cada escritura de respuestas
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ExportJob(db.Model):
+    __tablename__ = 'export_jobs'
+    __table_args__ = (
+        db.Index('idx_export_jobs_params_version', 'params_hash', 'data_version'),
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)
+    job_type = db.Column(db.String(20), nullable=False)  # responses, summary, detailed
+    params = db.Column(db.JSON)
+    params_hash = db.Column(db.String(64), nullable=False)
+    data_version = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed, expired
+    progress = db.Column(db.Integer, nullable=False, default=0)  # Porcentaje 0-100
+    filename = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'job_type': self.job_type,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'download_url': f'/api/reports/download/{self.filename}' if self.status == 'done' and self.filename else None,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+class ImpedimentRule(db.Model):
+    __tablename__ = 'impediment_rules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(100), nullable=False)
+    keyword = db.Column(db.String(100), nullable=False)  # Raíz de palabra, sin acentos ni mayúsculas
+    priority = db.Column(db.Integer, nullable=False, default=100)  # Menor valor gana si hay varias categorías
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'category': self.category,
+            'keyword': self.keyword,
+            'priority': self.priority,
+            'is_active': self.is_active
+        }
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_current_user
 from src.models.user import User
 from src.models.database import db
+from src.services.password_hashing import (
+    password_hash_pool, login_throttle, check_credentials, hash_password, needs_rehash,
+    HashingBusy, PasswordTooLong
+)
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -16,16 +19,44 @@ def login():
         if not username or not password:
             return jsonify({'error': 'Username y password son requeridos'}), 400
         
+        # Limitar intentos fallidos por usuario y por IP antes de gastar CPU en el hash
+        ip = request.remote_addr
+        retry_after = login_throttle.retry_after(username, ip)
+        if retry_after:
+            response = jsonify({'error': 'Demasiados intentos fallidos, intenta más tarde'})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        
         user = User.query.filter_by(username=username).first()
         
-        if not user or not check_password_hash(user.password_hash, password):
+        # La verificación corre en el pool acotado de hashing, no en el hilo de la petición
+        try:
+            valid = password_hash_pool.run(check_credentials, user.password_hash if user else None, password)
+        except PasswordTooLong:
+            valid = False
+        except HashingBusy:
+            return jsonify({'error': 'El servicio de autenticación está ocupado, intenta más tarde'}), 503
+        
+        if not valid:
+            login_throttle.record_failure(username, ip)
             return jsonify({'error': 'Credenciales inválidas'}), 401
         
         if not user.is_active:
             return jsonify({'error': 'Usuario inactivo'}), 401
         
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        login_throttle.reset(username)
+        
+        # Actualizar el hash al método y costo configurados; si el pool está ocupado se reintenta en otro login
+        if needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hash_pool.run(hash_password, password)
+                db.session.commit()
+            except HashingBusy:
+                pass
+        
+        # PyJWT exige que el claim sub sea un string
+        access_token = create_access_token(identity=str(user.id))
+        refresh_token = create_refresh_token(identity=str(user.id))
         
         return jsonify({
             'access_token': access_token,
@@ -40,11 +71,8 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     try:
+        # El user loader ya resolvió el usuario desde el cache y rechazó los inactivos
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or not user.is_active:
-            return jsonify({'error': 'Usuario no válido'}), 401
         
         access_token = create_access_token(identity=current_user_id)
         
@@ -57,15 +85,9 @@ def refresh():
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
-def get_current_user():
+def get_current_user_profile():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'Usuario no encontrado'}), 404
-        
-        return jsonify({'user': user.to_dict()}), 200
+        return jsonify({'user': get_current_user()}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,278 +1,383 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.user import SurveyResponse, QuestionAnswer, Question
+from src.models.user import SurveyResponse, QuestionAnswer
 from src.models.database import db
-from sqlalchemy import func, case
-from collections import defaultdict
+from src.services.question_registry import question_registry
+from src.services.org_graph import build_org_graph
+from src.services.aggregates import answer_distributions, response_totals
+from src.services.crosstab import crosstab
+from src.services.impediment_classifier import impediment_category_counts
+from src.services.satisfaction_trends import LIKERT_SCORES, satisfaction_trend
+from src.services.result_cache import cached_result, conditional_get
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Preguntas que necesita cada sección: distribuciones desde los agregados y
+# respuestas individuales (agrupadas por encuesta) para el análisis fila a fila
+SECTION_QUESTIONS = {
+    'stats': {'distributions': ['area', 'tenure'], 'answers': []},
+    'satisfaction': {'distributions': ['work_environment'], 'answers': []},
+    'hierarchy': {'distributions': [], 'answers': ['role', 'supervisor']},
+    'issues': {'distributions': ['has_impediment'], 'answers': []},
+}
+
 @dashboard_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@cached_result
 def get_dashboard_stats():
     try:
-        # Estadísticas generales
-        total_responses = SurveyResponse.query.count()
-        completed_responses = SurveyResponse.query.filter_by(status='completed').count()
-        completion_rate = (completed_responses / total_responses * 100) if total_responses > 0 else 0
-        
-        # Respuestas por área
-        area_question = Question.query.filter(Question.question_text.like('%área trabajas%')).first()
-        responses_by_area = []
-        if area_question:
-            area_stats = db.session.query(
-                QuestionAnswer.answer_text,
-                func.count(QuestionAnswer.id).label('count')
-            ).filter_by(question_id=area_question.id).group_by(QuestionAnswer.answer_text).all()
-            
-            responses_by_area = [{'area': stat[0], 'count': stat[1]} for stat in area_stats]
-        
-        # Respuestas por experiencia
-        exp_question = Question.query.filter(Question.question_text.like('%tiempo llevas trabajando%')).first()
-        responses_by_experience = []
-        if exp_question:
-            exp_stats = db.session.query(
-                QuestionAnswer.answer_text,
-                func.count(QuestionAnswer.id).label('count')
-            ).filter_by(question_id=exp_question.id).group_by(QuestionAnswer.answer_text).all()
-            
-            responses_by_experience = [{'experience': stat[0], 'count': stat[1]} for stat in exp_stats]
-        
-        return jsonify({
-            'total_responses': total_responses,
-            'completed_responses': completed_responses,
-            'completion_rate': round(completion_rate, 2),
-            'responses_by_area': responses_by_area,
-            'responses_by_experience': responses_by_experience
-        }), 200
-        
+        return jsonify(build_stats(load_dashboard_data(['stats']))), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dashboard_bp.route('/satisfaction', methods=['GET'])
 @jwt_required()
+@cached_result
 def get_satisfaction_analysis():
     try:
-        # Análisis de satisfacción general
-        satisfaction_question = Question.query.filter(Question.question_text.like('%ambiente laboral%')).first()
-        
-        overall_satisfaction = {'average': 0, 'distribution': []}
-        satisfaction_by_area = []
-        
-        if satisfaction_question:
-            # Mapeo de respuestas a valores numéricos
-            satisfaction_mapping = {
-                'Excelente': 5,
-                'Muy bueno': 4,
-                'Bueno': 3,
-                'Regular': 2,
-                'Malo': 1
-            }
-            
-            # Distribución general
-            satisfaction_stats = db.session.query(
-                QuestionAnswer.answer_text,
-                func.count(QuestionAnswer.id).label('count')
-            ).filter_by(question_id=satisfaction_question.id).group_by(QuestionAnswer.answer_text).all()
-            
-            total_responses = sum(stat[1] for stat in satisfaction_stats)
-            distribution = []
-            total_score = 0
-            
-            for answer, count in satisfaction_stats:
-                percentage = (count / total_responses * 100) if total_responses > 0 else 0
-                distribution.append({
-                    'rating': answer,
-                    'count': count,
-                    'percentage': round(percentage, 2)
-                })
-                
-                if answer in satisfaction_mapping:
-                    total_score += satisfaction_mapping[answer] * count
-            
-            average = (total_score / total_responses) if total_responses > 0 else 0
-            
-            overall_satisfaction = {
-                'average': round(average, 2),
-                'distribution': distribution
-            }
-            
-            # Satisfacción por área
-            area_question = Question.query.filter(Question.question_text.like('%área trabajas%')).first()
-            if area_question:
-                # Query compleja para obtener satisfacción por área
-                area_satisfaction = db.session.query(
-                    QuestionAnswer.answer_text.label('area'),
-                    func.avg(
-                        case(
-                            (QuestionAnswer.answer_text == 'Excelente', 5),
-                            (QuestionAnswer.answer_text == 'Muy bueno', 4),
-                            (QuestionAnswer.answer_text == 'Bueno', 3),
-                            (QuestionAnswer.answer_text == 'Regular', 2),
-                            (QuestionAnswer.answer_text == 'Malo', 1),
-                            else_=0
-                        )
-                    ).label('avg_satisfaction'),
-                    func.count(QuestionAnswer.id).label('count')
-                ).join(
-                    SurveyResponse, QuestionAnswer.survey_response_id == SurveyResponse.id
-                ).filter(
-                    QuestionAnswer.question_id == area_question.id
-                ).group_by(QuestionAnswer.answer_text).all()
-                
-                satisfaction_by_area = [
-                    {
-                        'area': result.area,
-                        'average': round(float(result.avg_satisfaction), 2) if result.avg_satisfaction else 0,
-                        'count': result.count
-                    }
-                    for result in area_satisfaction
-                ]
-        
-        return jsonify({
-            'overall_satisfaction': overall_satisfaction,
-            'satisfaction_by_area': satisfaction_by_area,
-            'satisfaction_trends': []  # Placeholder para tendencias temporales
-        }), 200
-        
+        return jsonify(build_satisfaction(load_dashboard_data(['satisfaction']))), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dashboard_bp.route('/hierarchy', methods=['GET'])
 @jwt_required()
+@cached_result
 def get_hierarchy_analysis():
     try:
-        # Obtener preguntas relevantes
-        role_question = Question.query.filter(Question.question_text.like('%rol específico%')).first()
-        supervisor_question = Question.query.filter(Question.question_text.like('%líder directo%')).first()
-        
-        organizational_chart = []
-        management_levels = 0
-        areas_without_clear_hierarchy = []
+        return jsonify(build_hierarchy(load_dashboard_data(['hierarchy']))), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/issues', methods=['GET'])
+@jwt_required()
+@cached_result
+def get_issues_analysis():
+    try:
+        return jsonify(build_issues(load_dashboard_data(['issues']))), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/overview', methods=['GET'])
+@jwt_required()
+@cached_result
+def get_dashboard_overview():
+    try:
+        sections_param = request.args.get('sections')
+        sections = [name.strip() for name in sections_param.split(',') if name.strip()] if sections_param else list(SECTION_BUILDERS)
         
-        if role_question and supervisor_question:
-            # Obtener todas las respuestas de roles y supervisores
-            responses = db.session.query(
-                SurveyResponse.id,
-                SurveyResponse.employee_name,
-                SurveyResponse.employee_area
-            ).filter_by(status='completed').all()
-            
-            hierarchy_data = {}
-            
-            for response in responses:
-                # Obtener rol del empleado
-                role_answer = QuestionAnswer.query.filter_by(
-                    survey_response_id=response.id,
-                    question_id=role_question.id
-                ).first()
-                
-                # Obtener supervisor del empleado
-                supervisor_answer = QuestionAnswer.query.filter_by(
-                    survey_response_id=response.id,
-                    question_id=supervisor_question.id
-                ).first()
-                
-                if role_answer and supervisor_answer:
-                    supervisor_name = supervisor_answer.answer_text
-                    
-                    if supervisor_name not in hierarchy_data:
-                        hierarchy_data[supervisor_name] = []
-                    
-                    hierarchy_data[supervisor_name].append({
-                        'name': response.employee_name or 'Anónimo',
-                        'role': role_answer.answer_text,
-                        'area': response.employee_area
-                    })
-            
-            # Convertir a formato de organigrama
-            for supervisor, direct_reports in hierarchy_data.items():
-                organizational_chart.append({
-                    'supervisor': supervisor,
-                    'direct_reports': direct_reports,
-                    'span_of_control': len(direct_reports)
-                })
-            
-            # Calcular niveles de gestión (simplificado)
-            management_levels = len(organizational_chart)
+        invalid = [name for name in sections if name not in SECTION_BUILDERS]
+        if invalid:
+            return jsonify({'error': f"Secciones no válidas: {', '.join(invalid)}"}), 400
         
-        return jsonify({
-            'organizational_chart': organizational_chart,
-            'management_levels': management_levels,
-            'areas_without_clear_hierarchy': areas_without_clear_hierarchy
-        }), 200
+        # Un solo conjunto de datos compartido por todas las secciones pedidas
+        data = load_dashboard_data(sections)
         
+        return jsonify({name: SECTION_BUILDERS[name](data) for name in sections}), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@dashboard_bp.route('/issues', methods=['GET'])
+@dashboard_bp.route('/crosstab', methods=['GET'])
 @jwt_required()
-def get_issues_analysis():
+@conditional_get
+def get_crosstab():
     try:
-        # Análisis de impedimentos
-        impediment_question = Question.query.filter(Question.question_text.like('%impedimento%')).first()
-        impediment_details_question = Question.query.filter(Question.question_text.like('%especifica cuáles%')).first()
+        row_question_id = request.args.get('row_question_id', type=int)
+        column_question_id = request.args.get('column_question_id', type=int)
+        completed_only = request.args.get('completed_only', 'false').lower() == 'true'
+        source = request.args.get('source', 'db')
         
-        common_impediments = []
-        improvement_suggestions = []
-        training_needs = []
+        if not row_question_id or not column_question_id:
+            return jsonify({'error': 'row_question_id y column_question_id son requeridos'}), 400
         
-        if impediment_question and impediment_details_question:
-            # Obtener respuestas de impedimentos
-            impediment_responses = db.session.query(
-                QuestionAnswer.answer_text,
-                func.count(QuestionAnswer.id).label('count')
-            ).filter_by(question_id=impediment_question.id).group_by(QuestionAnswer.answer_text).all()
+        if source == 'snapshot':
+            # Import diferido: el snapshot (mmap) solo se carga si se pide
+            from src.services.snapshot import snapshot_store, get_snapshot_path
             
-            total_impediment_responses = sum(resp[1] for resp in impediment_responses)
-            
-            for answer, count in impediment_responses:
-                percentage = (count / total_impediment_responses * 100) if total_impediment_responses > 0 else 0
-                common_impediments.append({
-                    'impediment': answer,
-                    'frequency': count,
-                    'percentage': round(percentage, 2),
-                    'affected_areas': []  # Placeholder
-                })
-            
-            # Obtener detalles de impedimentos específicos
-            specific_impediments = QuestionAnswer.query.filter_by(
-                question_id=impediment_details_question.id
-            ).filter(QuestionAnswer.answer_text.isnot(None)).all()
+            # El snapshot columnar solo contiene encuestas completadas
+            snapshot = snapshot_store.get(get_snapshot_path())
+            if snapshot is None:
+                return jsonify({'error': 'Snapshot no disponible'}), 404
+            return jsonify(snapshot.crosstab(row_question_id, column_question_id)), 200
+        
+        return jsonify(crosstab(row_question_id, column_question_id, completed_only=completed_only)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def load_dashboard_data(sections):
+    """Cargar en una pasada los datos que necesitan las secciones indicadas"""
+    distribution_keys = set()
+    answer_keys = set()
+    for name in sections:
+        distribution_keys.update(SECTION_QUESTIONS[name]['distributions'])
+        answer_keys.update(SECTION_QUESTIONS[name]['answers'])
+    
+    questions = {
+        key: question_registry.get(key)
+        for key in distribution_keys | answer_keys | {'area', 'impediment_details'}
+    }
+    
+    data = {
+        'questions': questions,
+        'totals': response_totals() if 'stats' in sections else (0, 0),
+        'distributions': answer_distributions(
+            [questions[key] for key in distribution_keys if questions[key]]
+        ),
+        'responses': {}
+    }
+    
+    answer_ids = [questions[key] for key in answer_keys if questions[key]]
+    if answer_ids:
+        # La jerarquía (única sección con respuestas por encuesta) solo usa encuestas completadas
+        data['responses'] = load_answers_by_response(answer_ids, status='completed')
+    
+    # Categorías de impedimentos ya clasificadas al guardar
+    data['impediment_categories'] = []
+    if 'issues' in sections and questions['impediment_details']:
+        data['impediment_categories'] = impediment_category_counts(questions['impediment_details'])
+    
+    # Tendencia mensual desde los buckets precalculados
+    data['satisfaction_trends'] = satisfaction_trend('month') if 'satisfaction' in sections else []
+    
+    return data
+
+def load_answers_by_response(question_ids, status=None):
+    """Respuestas de texto a las preguntas indicadas, agrupadas por encuesta
+    
+    Incluye todas las encuestas con ese estado (o todas si no se indica), aunque no tengan
+    respuesta a esas preguntas, en orden de id.
+    """
+    query = db.session.query(
+        SurveyResponse.id,
+        SurveyResponse.status,
+        SurveyResponse.employee_name,
+        SurveyResponse.employee_area,
+        QuestionAnswer.question_id,
+        QuestionAnswer.answer_text
+    ).outerjoin(
+        QuestionAnswer,
+        (QuestionAnswer.survey_response_id == SurveyResponse.id) &
+        QuestionAnswer.question_id.in_(question_ids)
+    )
+    if status is not None:
+        query = query.filter(SurveyResponse.status == status)
+    rows = query.order_by(SurveyResponse.id).all()
+    
+    responses = {}
+    for response_id, status, employee_name, employee_area, question_id, answer_text in rows:
+        response = responses.get(response_id)
+        if response is None:
+            response = responses[response_id] = {
+                'status': status,
+                'employee_name': employee_name,
+                'employee_area': employee_area,
+                'answers': {}
+            }
+        if question_id is not None:
+            response['answers'][question_id] = answer_text
+    return responses
+
+def build_stats(data):
+    """Estadísticas generales"""
+    total_responses, completed_responses = data['totals']
+    completion_rate = (completed_responses / total_responses * 100) if total_responses > 0 else 0
+    
+    # Respuestas por área
+    area_question_id = data['questions']['area']
+    responses_by_area = []
+    if area_question_id:
+        area_stats = data['distributions'][area_question_id]
+        
+        responses_by_area = [{'area': stat[0], 'count': stat[1]} for stat in area_stats]
+    
+    # Respuestas por experiencia
+    exp_question_id = data['questions']['tenure']
+    responses_by_experience = []
+    if exp_question_id:
+        exp_stats = data['distributions'][exp_question_id]
+        
+        responses_by_experience = [{'experience': stat[0], 'count': stat[1]} for stat in exp_stats]
+    
+    return {
+        'total_responses': total_responses,
+        'completed_responses': completed_responses,
+        'completion_rate': round(completion_rate, 2),
+        'responses_by_area': responses_by_area,
+        'responses_by_experience': responses_by_experience
+    }
+
+def build_satisfaction(data):
+    """Análisis de satisfacción general"""
+    satisfaction_question_id = data['questions']['work_environment']
+    
+    overall_satisfaction = {'average': 0, 'distribution': []}
+    satisfaction_by_area = []
+    
+    if satisfaction_question_id:
+        # Mapeo de respuestas a valores numéricos
+        satisfaction_mapping = LIKERT_SCORES['work_environment']
+        
+        # Distribución general
+        satisfaction_stats = data['distributions'][satisfaction_question_id]
+        
+        total_responses = sum(stat[1] for stat in satisfaction_stats)
+        distribution = []
+        total_score = 0
+        
+        for answer, count in satisfaction_stats:
+            percentage = (count / total_responses * 100) if total_responses > 0 else 0
+            distribution.append({
+                'rating': answer,
+                'count': count,
+                'percentage': round(percentage, 2)
+            })
             
-            # Análisis básico de texto para categorizar impedimentos
-            impediment_categories = defaultdict(int)
-            for imp in specific_impediments:
-                text = imp.answer_text.lower()
-                if 'herramienta' in text or 'equipo' in text:
-                    impediment_categories['Falta de herramientas/equipos'] += 1
-                elif 'capacitación' in text or 'entrenamiento' in text:
-                    impediment_categories['Falta de capacitación'] += 1
-                elif 'comunicación' in text:
-                    impediment_categories['Problemas de comunicación'] += 1
-                elif 'tiempo' in text or 'sobrecarga' in text:
-                    impediment_categories['Sobrecarga de trabajo'] += 1
-                else:
-                    impediment_categories['Otros'] += 1
+            if answer in satisfaction_mapping:
+                total_score += satisfaction_mapping[answer] * count
+        
+        average = (total_score / total_responses) if total_responses > 0 else 0
+        
+        overall_satisfaction = {
+            'average': round(average, 2),
+            'distribution': distribution
+        }
+        
+        # Satisfacción por área: tabla cruzada área x ambiente laboral
+        area_question_id = data['questions']['area']
+        if area_question_id:
+            area_satisfaction = crosstab(area_question_id, satisfaction_question_id, scores=satisfaction_mapping)
             
-            improvement_suggestions = [
-                {'suggestion': category, 'frequency': count, 'category': 'Operacional'}
-                for category, count in impediment_categories.items()
+            satisfaction_by_area = [
+                {
+                    'area': area,
+                    'average': round(area_satisfaction['means'].get(area, 0), 2),
+                    'count': area_satisfaction['row_totals'][area]
+                }
+                for area in area_satisfaction['rows']
             ]
-        
-        # Análisis de necesidades de capacitación (placeholder)
-        training_needs = [
-            {'training_type': 'Capacitación técnica', 'requests': 5, 'areas': ['Mecánica']},
-            {'training_type': 'Atención al cliente', 'requests': 3, 'areas': ['Ventas', 'Administración']},
-            {'training_type': 'Liderazgo', 'requests': 2, 'areas': ['Administración']}
+    
+    return {
+        'overall_satisfaction': overall_satisfaction,
+        'satisfaction_by_area': satisfaction_by_area,
+        'satisfaction_trends': data['satisfaction_trends']
+    }
+
+def build_hierarchy(data):
+    """Análisis de estructura jerárquica"""
+    role_question_id = data['questions']['role']
+    supervisor_question_id = data['questions']['supervisor']
+    
+    organizational_chart = []
+    management_levels = 0
+    areas_without_clear_hierarchy = []
+    span_of_control = {'supervisors': 0, 'min': 0, 'max': 0, 'average': 0, 'median': 0}
+    cycles = []
+    orphaned_nodes = []
+    
+    if role_question_id and supervisor_question_id:
+        # Rol y supervisor de cada respuesta completada
+        responses = [
+            response for response in data['responses'].values()
+            if response['status'] == 'completed'
         ]
         
-        return jsonify({
-            'common_impediments': common_impediments,
-            'improvement_suggestions': improvement_suggestions,
-            'training_needs': training_needs
-        }), 200
+        hierarchy_data = {}
         
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        for response in responses:
+            answers = response['answers']
+            if role_question_id in answers and supervisor_question_id in answers:
+                supervisor_name = answers[supervisor_question_id]
+                
+                if supervisor_name not in hierarchy_data:
+                    hierarchy_data[supervisor_name] = []
+                
+                hierarchy_data[supervisor_name].append({
+                    'name': response['employee_name'] or 'Anónimo',
+                    'role': answers[role_question_id],
+                    'area': response['employee_area']
+                })
+        
+        # Convertir a formato de organigrama
+        for supervisor, direct_reports in hierarchy_data.items():
+            organizational_chart.append({
+                'supervisor': supervisor,
+                'direct_reports': direct_reports,
+                'span_of_control': len(direct_reports)
+            })
+        
+        # Grafo organizacional: niveles reales, amplitud de control, ciclos y huérfanos
+        org_graph = build_org_graph(
+            (response['employee_name'], response['employee_area'], response['answers'].get(supervisor_question_id))
+            for response in responses
+        )
+        management_levels = org_graph['management_levels']
+        areas_without_clear_hierarchy = org_graph['areas_without_clear_hierarchy']
+        span_of_control = org_graph['span_of_control']
+        cycles = org_graph['cycles']
+        orphaned_nodes = org_graph['orphaned_nodes']
+    
+    return {
+        'organizational_chart': organizational_chart,
+        'management_levels': management_levels,
+        'areas_without_clear_hierarchy': areas_without_clear_hierarchy,
+        'span_of_control': span_of_control,
+        'cycles': cycles,
+        'orphaned_nodes': orphaned_nodes
+    }
+
+def build_issues(data):
+    """Análisis de impedimentos"""
+    impediment_question_id = data['questions']['has_impediment']
+    impediment_details_question_id = data['questions']['impediment_details']
+    
+    common_impediments = []
+    improvement_suggestions = []
+    training_needs = []
+    
+    if impediment_question_id and impediment_details_question_id:
+        # Obtener respuestas de impedimentos
+        impediment_responses = data['distributions'][impediment_question_id]
+        
+        total_impediment_responses = sum(resp[1] for resp in impediment_responses)
+        
+        for answer, count in impediment_responses:
+            percentage = (count / total_impediment_responses * 100) if total_impediment_responses > 0 else 0
+            common_impediments.append({
+                'impediment': answer,
+                'frequency': count,
+                'percentage': round(percentage, 2),
+                'affected_areas': []  # Placeholder
+            })
+        
+        # Categorías almacenadas al guardar cada respuesta
+        impediment_categories = data['impediment_categories']
+        
+        improvement_suggestions = [
+            {'suggestion': category, 'frequency': count, 'category': 'Operacional'}
+            for category, count in impediment_categories
+        ]
+    
+    # Análisis de necesidades de capacitación (placeholder)
+    training_needs = [
+        {'training_type': 'Capacitación técnica', 'requests': 5, 'areas': ['Mecánica']},
+        {'training_type': 'Atención al cliente', 'requests': 3, 'areas': ['Ventas', 'Administración']},
+        {'training_type': 'Liderazgo', 'requests': 2, 'areas': ['Administración']}
+    ]
+    
+    return {
+        'common_impediments': common_impediments,
+        'improvement_suggestions': improvement_suggestions,
+        'training_needs': training_needs
+    }
 
+SECTION_BUILDERS = {
+    'stats': build_stats,
+    'satisfaction': build_satisfaction,
+    'hierarchy': build_hierarchy,
+    'issues': build_issues,
+}
@@ -1,225 +1,579 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, send_from_directory, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.user import SurveyResponse, QuestionAnswer, Question
-from src.models.database import db
-import json
+from werkzeug.security import safe_join
+from sqlalchemy import case, text
+from src.models.user import SurveyResponse, QuestionAnswer, Question, ExportJob
+from src.models.database import db, read_session
+from src.services.answer_search import search_answers
+from src.services.satisfaction_trends import GRANULARITIES, DEFAULT_TREND_QUESTION, LIKERT_SCORES, satisfaction_trend
+from src.services.result_cache import cached_result, conditional_get
 import csv
+import base64
+import binascii
+import math
 import io
+import os
 from datetime import datetime
 
 reports_bp = Blueprint('reports', __name__)
 
+# Filas leídas de la base (y enviadas al cliente) por lote al exportar
+CSV_BATCH_SIZE = 1000
+# Tamaño de página de la exportación JSON (ajustable con page_size hasta el máximo)
+EXPORT_PAGE_SIZE = 500
+EXPORT_MAX_PAGE_SIZE = 5000
+
 @reports_bp.route('/summary', methods=['GET'])
 @jwt_required()
+@cached_result
 def get_summary_report():
     try:
         format_type = request.args.get('format', 'json')
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
         
-        # Construir query base
-        query = SurveyResponse.query.filter_by(status='completed')
-        
-        if date_from:
-            query = query.filter(SurveyResponse.completed_at >= datetime.fromisoformat(date_from))
-        if date_to:
-            query = query.filter(SurveyResponse.completed_at <= datetime.fromisoformat(date_to))
-        
-        responses = query.all()
-        
-        # Generar datos del reporte
-        report_data = {
-            'generated_at': datetime.utcnow().isoformat(),
-            'period': {
-                'from': date_from,
-                'to': date_to
-            },
-            'summary': {
-                'total_responses': len(responses),
-                'response_rate': '85%',  # Placeholder
-                'completion_time_avg': '12 minutos'  # Placeholder
-            },
-            'key_findings': [
-                'El 78% de los empleados considera el ambiente laboral como bueno o excelente',
-                'La principal área de mejora identificada es la disponibilidad de herramientas',
-                'El 65% de los empleados se siente valorado en su trabajo',
-                'Se identificaron 3 niveles jerárquicos principales'
-            ],
-            'recommendations': [
-                'Implementar un sistema de gestión de herramientas y equipos',
-                'Establecer reuniones regulares de feedback entre supervisores y empleados',
-                'Crear un programa de reconocimiento de empleados',
-                'Documentar formalmente la estructura organizacional'
-            ]
-        }
-        
-        if format_type == 'json':
-            return jsonify({'report_data': report_data}), 200
-        else:
-            # Para otros formatos, retornar URL de descarga (placeholder)
+        if format_type != 'json':
+            # El único archivo descargable es el JSON que genera POST /api/reports/jobs
             return jsonify({
-                'download_url': f'/api/reports/download/summary_{format_type}_{datetime.now().strftime("%Y%m%d")}'
-            }), 200
+                'error': "Formato no soportado. Usar format=json, o POST /api/reports/jobs con job_type 'summary' para un archivo"
+            }), 400
+        try:
+            parse_report_dates(date_from, date_to)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        report_data = build_summary_report(date_from, date_to)
         
+        return jsonify({'report_data': report_data}), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/detailed', methods=['GET'])
 @jwt_required()
+@cached_result
 def get_detailed_report():
     try:
         section = request.args.get('section')
         area = request.args.get('area')
         format_type = request.args.get('format', 'json')
         
-        # Análisis detallado por sección
-        section_analysis = {}
-        recommendations = []
-        action_items = []
-        
-        if section == 'Ambiente Laboral':
-            section_analysis = {
-                'section_name': 'Ambiente Laboral',
-                'response_count': 25,
-                'satisfaction_score': 3.8,
-                'key_metrics': {
-                    'ambiente_general': 3.8,
-                    'valoracion_personal': 3.5,
-                    'comunicacion_equipos': 3.6
-                },
-                'trends': 'Mejora gradual en los últimos 6 meses',
-                'areas_concern': ['Valoración personal', 'Comunicación entre turnos']
-            }
-            
-            recommendations = [
-                'Implementar programa de reconocimiento mensual',
-                'Establecer reuniones de coordinación entre turnos',
-                'Crear espacios de descanso más cómodos'
-            ]
-            
-            action_items = [
-                'Diseñar sistema de reconocimiento - Responsable: RRHH - Plazo: 30 días',
-                'Programar reuniones inter-turno - Responsable: Supervisores - Plazo: 15 días',
-                'Evaluar espacios comunes - Responsable: Administración - Plazo: 45 días'
-            ]
+        return jsonify(build_detailed_report(section, area)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def parse_report_dates(date_from=None, date_to=None):
+    """Convertir los parámetros date_from y date_to (ISO 8601); ValueError si alguno no es válido"""
+    dates = []
+    for name, value in (('date_from', date_from), ('date_to', date_to)):
+        try:
+            dates.append(datetime.fromisoformat(value) if value else None)
+        except (TypeError, ValueError):
+            raise ValueError(f'{name} no es una fecha válida (YYYY-MM-DD)')
+    return dates
+
+def build_summary_report(date_from=None, date_to=None):
+    """Generar los datos del reporte resumen para un rango de fechas, calculados en SQL"""
+    date_from, date_to = parse_report_dates(date_from, date_to)
+    
+    # Filtro sobre el índice compuesto (status, completed_at); nunca se materializan objetos ORM
+    where = "status = 'completed'"
+    params = {}
+    if date_from:
+        where += " AND completed_at >= :date_from"
+        params['date_from'] = date_from
+    if date_to:
+        where += " AND completed_at <= :date_to"
+        params['date_to'] = date_to
+    
+    completed_by_area = {
+        area: count for area, count in db.session.execute(text(f"""
+            SELECT employee_area, COUNT(*) FROM survey_responses
+            WHERE {where}
+            GROUP BY employee_area
+        """), params)
+    }
+    total_responses = sum(completed_by_area.values())
+    
+    # Tasa de respuesta contra la dotación configurada por área (AREA_HEADCOUNT)
+    headcount = current_app.config.get('AREA_HEADCOUNT') or {}
+    by_area = [
+        {
+            'area': area,
+            'completed': completed_by_area.get(area, 0),
+            'headcount': headcount.get(area),
+            'response_rate': response_rate(completed_by_area.get(area, 0), headcount.get(area))
+        }
+        for area in sorted(set(completed_by_area) | set(headcount), key=lambda a: (a is None, a or ''))
+    ]
+    # La tasa global solo considera las áreas con dotación configurada
+    overall_rate = response_rate(
+        sum(completed_by_area.get(area, 0) for area in headcount),
+        sum(headcount.values())
+    )
+    
+    completion_time = completion_time_stats(where, params, total_responses)
+    
+    # Generar datos del reporte
+    report_data = {
+        'generated_at': datetime.utcnow().isoformat(),
+        'period': {
+            'from': date_from,
+            'to': date_to
+        },
+        'summary': {
+            'total_responses': total_responses,
+            'response_rate': f"{overall_rate}%" if overall_rate is not None else 'N/D',
+            'completion_time_avg': (
+                f"{round(completion_time['mean_minutes'])} minutos"
+                if completion_time['mean_minutes'] is not None else 'N/D'
+            )
+        },
+        'response_rate': overall_rate,
+        'by_area': by_area,
+        'completion_time': completion_time,
+        'key_findings': summary_findings(total_responses, by_area, completion_time),
+        'recommendations': [
+            'Implementar un sistema de gestión de herramientas y equipos',
+            'Establecer reuniones regulares de feedback entre supervisores y empleados',
+            'Crear un programa de reconocimiento de empleados',
+            'Documentar formalmente la estructura organizacional'
+        ]
+    }
+    
+    return report_data
+
+def response_rate(completed, headcount):
+    """Porcentaje de respuestas completadas sobre la dotación, o None sin dotación"""
+    if not headcount:
+        return None
+    return round(completed * 100 / headcount, 1)
+
+def completion_time_stats(where, params, count):
+    """Media, mediana y p90 de la duración (minutos) entre started_at y completed_at"""
+    duration = "(julianday(completed_at) - julianday(started_at)) * 1440.0"
+    base = f"FROM survey_responses WHERE {where} AND started_at IS NOT NULL"
+    stats = {'mean_minutes': None, 'median_minutes': None, 'p90_minutes': None}
+    if not count:
+        return stats
+    
+    stats['mean_minutes'] = db.session.execute(text(f"SELECT AVG({duration}) {base}"), params).scalar()
+    
+    def nth(offset, limit=1):
+        # Percentiles por rango: un recorrido ordenado en SQLite, sin traer las filas
+        values = db.session.execute(
+            text(f"SELECT {duration} AS d {base} ORDER BY d LIMIT :limit OFFSET :offset"),
+            {**params, 'limit': limit, 'offset': offset}
+        ).scalars().all()
+        return sum(values) / len(values) if values else None
+    
+    n = db.session.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+    if n:
+        stats['median_minutes'] = nth((n - 1) // 2, 1 if n % 2 else 2)
+        stats['p90_minutes'] = nth(max(math.ceil(0.9 * n) - 1, 0))
+    
+    return {key: round(value, 1) if value is not None else None for key, value in stats.items()}
+
+def summary_findings(total_responses, by_area, completion_time):
+    """Hallazgos del período redactados a partir de las métricas calculadas"""
+    if not total_responses:
+        return ['No hay encuestas completadas en el período seleccionado']
+    
+    findings = [f'Se completaron {total_responses} encuestas en el período']
+    rated = [area for area in by_area if area['response_rate'] is not None]
+    if rated:
+        best = max(rated, key=lambda area: area['response_rate'])
+        worst = min(rated, key=lambda area: area['response_rate'])
+        findings.append(f"{best['area']} tiene la mayor tasa de respuesta ({best['response_rate']}%)")
+        if worst is not best:
+            findings.append(f"{worst['area']} tiene la menor tasa de respuesta ({worst['response_rate']}%)")
+    else:
+        top = max(by_area, key=lambda area: area['completed'])
+        findings.append(f"{top['area'] or 'Sin área'} concentra la mayor cantidad de respuestas ({top['completed']})")
+    if completion_time['median_minutes'] is not None:
+        findings.append(
+            f"La mitad de los participantes completó la encuesta en menos de {round(completion_time['median_minutes'])} minutos"
+        )
+    return findings
+
+def build_detailed_report(section, area=None):
+    """Generar el análisis detallado de una sección"""
+    # Análisis detallado por sección
+    section_analysis = {}
+    recommendations = []
+    action_items = []
+    
+    if section == 'Ambiente Laboral':
+        section_analysis = {
+            'section_name': 'Ambiente Laboral',
+            'response_count': 25,
+            'satisfaction_score': 3.8,
+            'key_metrics': {
+                'ambiente_general': 3.8,
+                'valoracion_personal': 3.5,
+                'comunicacion_equipos': 3.6
+            },
+            'trends': 'Mejora gradual en los últimos 6 meses',
+            'areas_concern': ['Valoración personal', 'Comunicación entre turnos']
+        }
         
-        elif section == 'Estructura Organizacional':
-            section_analysis = {
-                'section_name': 'Estructura Organizacional',
-                'response_count': 25,
-                'clarity_score': 2.9,
-                'hierarchy_levels': 3,
-                'span_of_control_avg': 4.2,
-                'areas_unclear_hierarchy': ['Área de limpieza', 'Seguridad nocturna']
-            }
-            
-            recommendations = [
-                'Crear organigrama visual oficial',
-                'Definir roles y responsabilidades por escrito',
-                'Establecer líneas de reporte claras'
-            ]
-            
-            action_items = [
-                'Documentar organigrama - Responsable: Gerencia - Plazo: 20 días',
-                'Crear manual de roles - Responsable: RRHH - Plazo: 30 días',
-                'Comunicar estructura a todo el personal - Responsable: Gerencia - Plazo: 35 días'
-            ]
+        recommendations = [
+            'Implementar programa de reconocimiento mensual',
+            'Establecer reuniones de coordinación entre turnos',
+            'Crear espacios de descanso más cómodos'
+        ]
         
-        return jsonify({
-            'section_analysis': section_analysis,
-            'recommendations': recommendations,
-            'action_items': action_items
-        }), 200
+        action_items = [
+            'Diseñar sistema de reconocimiento - Responsable: RRHH - Plazo: 30 días',
+            'Programar reuniones inter-turno - Responsable: Supervisores - Plazo: 15 días',
+            'Evaluar espacios comunes - Responsable: Administración - Plazo: 45 días'
+        ]
+    
+    elif section == 'Estructura Organizacional':
+        section_analysis = {
+            'section_name': 'Estructura Organizacional',
+            'response_count': 25,
+            'clarity_score': 2.9,
+            'hierarchy_levels': 3,
+            'span_of_control_avg': 4.2,
+            'areas_unclear_hierarchy': ['Área de limpieza', 'Seguridad nocturna']
+        }
         
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        recommendations = [
+            'Crear organigrama visual oficial',
+            'Definir roles y responsabilidades por escrito',
+            'Establecer líneas de reporte claras'
+        ]
+        
+        action_items = [
+            'Documentar organigrama - Responsable: Gerencia - Plazo: 20 días',
+            'Crear manual de roles - Responsable: RRHH - Plazo: 30 días',
+            'Comunicar estructura a todo el personal - Responsable: Gerencia - Plazo: 35 días'
+        ]
+    
+    return {
+        'section_analysis': section_analysis,
+        'recommendations': recommendations,
+        'action_items': action_items
+    }
 
 @reports_bp.route('/responses', methods=['GET'])
 @jwt_required()
+@conditional_get
 def export_responses():
     try:
         format_type = request.args.get('format', 'json')
         include_personal_data = request.args.get('include_personal_data', 'false').lower() == 'true'
         area = request.args.get('area')
         
-        # Construir query
-        query = SurveyResponse.query.filter_by(status='completed')
-        if area:
-            query = query.filter_by(employee_area=area)
-        
-        responses = query.all()
-        
         if format_type == 'csv':
-            # Generar CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
+            # CSV en streaming: filas leídas de la base por lotes, memoria constante
+            filename = f"responses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            return Response(
+                stream_with_context(generate_responses_csv(area, include_personal_data)),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        
+        else:
+            page_size = min(max(request.args.get('page_size', EXPORT_PAGE_SIZE, type=int), 1), EXPORT_MAX_PAGE_SIZE)
+            try:
+                after_id = decode_cursor(request.args.get('cursor'))
+            except ValueError:
+                return jsonify({'error': 'cursor no válido'}), 400
             
-            # Headers
-            headers = ['ID', 'Área', 'Experiencia', 'Fecha Completado']
-            if include_personal_data:
-                headers.insert(1, 'Nombre')
+            layout = request.args.get('layout', 'objects')
+            if layout not in ('objects', 'rows'):
+                return jsonify({'error': 'layout debe ser objects o rows'}), 400
             
-            writer.writerow(headers)
+            # Paginación por cursor: rango indexado (status[, área], id) > cursor, nunca OFFSET
+            names, columns = export_columns(include_personal_data)
+            query = db.session.query(*columns).filter(
+                SurveyResponse.status == 'completed',
+                SurveyResponse.id > after_id
+            )
+            if area:
+                query = query.filter(SurveyResponse.employee_area == area)
             
-            # Datos
-            for response in responses:
-                row = [
-                    response.id,
-                    response.employee_area,
-                    response.work_experience,
-                    response.completed_at.strftime('%Y-%m-%d %H:%M') if response.completed_at else ''
-                ]
-                if include_personal_data:
-                    row.insert(1, response.employee_name if not response.is_anonymous else 'Anónimo')
-                
-                writer.writerow(row)
+            # Una fila extra indica si hay otra página
+            rows = query.order_by(SurveyResponse.id).limit(page_size + 1).all()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
             
-            output.seek(0)
+            page = {
+                'total_records': len(rows),
+                'page_size': page_size,
+                'next_cursor': encode_cursor(rows[-1].id) if has_more else None
+            }
+            if layout == 'rows':
+                # Las filas se serializan directamente como arreglos, sin un diccionario por fila
+                page.update({'columns': names, 'rows': rows})
+            else:
+                page['responses'] = [dict(zip(names, row)) for row in rows]
             
-            # Crear archivo temporal y retornar URL
-            filename = f"responses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            return jsonify({
-                'download_url': f'/api/reports/download/{filename}',
-                'total_records': len(responses)
-            }), 200
+            return jsonify(page), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def export_columns(include_personal_data=False):
+    """Nombres y expresiones de las columnas de la exportación; el anonimato se resuelve en SQL"""
+    columns = [
+        ('id', SurveyResponse.id),
+        ('area', SurveyResponse.employee_area),
+        ('experience', SurveyResponse.work_experience),
+        ('completed_at', SurveyResponse.completed_at),
+        ('is_anonymous', SurveyResponse.is_anonymous)
+    ]
+    if include_personal_data:
+        columns.append(('name', case(
+            (SurveyResponse.is_anonymous == True, 'Anónimo'),
+            else_=SurveyResponse.employee_name
+        ).label('name')))
+    return [name for name, _ in columns], [column for _, column in columns]
+
+def encode_cursor(last_id):
+    """Token opaco con el último id entregado"""
+    return base64.urlsafe_b64encode(str(last_id).encode('ascii')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Último id entregado según el token (0 sin cursor); ValueError si el token no es válido"""
+    if not cursor:
+        return 0
+    try:
+        last_id = int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii'))
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(cursor)
+    if last_id < 0:
+        raise ValueError(cursor)
+    return last_id
+
+@reports_bp.route('/download/<path:filename>', methods=['GET'])
+@jwt_required()
+def download_report(filename):
+    export_dir = get_export_dir()
+    
+    # safe_join rechaza rutas fuera del directorio de exportaciones
+    path = safe_join(export_dir, filename)
+    if not path or not os.path.isfile(path):
+        return jsonify({'error': 'Archivo no encontrado'}), 404
+    
+    return send_from_directory(export_dir, filename, as_attachment=True)
+
+def get_export_dir():
+    """Directorio donde se guardan los archivos generados para descarga"""
+    export_dir = current_app.config.get('EXPORT_DIR') or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'database', 'exports'
+    )
+    os.makedirs(export_dir, exist_ok=True)
+    return export_dir
+
+def generate_responses_csv(area=None, include_personal_data=False, batch_size=CSV_BATCH_SIZE, on_batch=None):
+    """Generar el CSV de respuestas completadas por lotes, sin cargar todo en memoria
+    
+    on_batch, si se indica, recibe la cantidad acumulada de filas escritas tras cada lote.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    
+    # Headers
+    headers = ['ID', 'Área', 'Experiencia', 'Fecha Completado']
+    if include_personal_data:
+        headers.insert(1, 'Nombre')
+    
+    writer.writerow(headers)
+    
+    # Lectura larga: se hace sobre el engine de solo lectura para no retener conexiones de escritura
+    with read_session() as session:
+        query = session.query(
+            SurveyResponse.id,
+            SurveyResponse.employee_name,
+            SurveyResponse.employee_area,
+            SurveyResponse.work_experience,
+            SurveyResponse.completed_at,
+            SurveyResponse.is_anonymous
+        ).filter(SurveyResponse.status == 'completed')
+        if area:
+            query = query.filter(SurveyResponse.employee_area == area)
         
-        else:
-            # Formato JSON
-            data = []
-            for response in responses:
-                response_data = {
-                    'id': response.id,
-                    'area': response.employee_area,
-                    'experience': response.work_experience,
-                    'completed_at': response.completed_at.isoformat() if response.completed_at else None,
-                    'is_anonymous': response.is_anonymous
-                }
-                
-                if include_personal_data:
-                    response_data['name'] = response.employee_name if not response.is_anonymous else 'Anónimo'
-                
-                data.append(response_data)
+        rows_in_buffer = 0
+        rows_written = 0
+        for response in query.order_by(SurveyResponse.id).yield_per(batch_size):
+            row = [
+                response.id,
+                response.employee_area,
+                response.work_experience,
+                response.completed_at.strftime('%Y-%m-%d %H:%M') if response.completed_at else ''
+            ]
+            if include_personal_data:
+                row.insert(1, response.employee_name if not response.is_anonymous else 'Anónimo')
             
-            return jsonify({
-                'responses': data,
-                'total_records': len(data)
-            }), 200
+            writer.writerow(row)
+            rows_in_buffer += 1
+            rows_written += 1
+            
+            if rows_in_buffer >= batch_size:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+                rows_in_buffer = 0
+                if on_batch:
+                    on_batch(rows_written)
+    
+    yield output.getvalue()
+
+@reports_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def create_export_job():
+    # Import diferido: el pool de hilos de exportación se crea solo al usarse
+    from src.services.export_jobs import export_job_queue, JobQueueFull
+    
+    try:
+        data = request.get_json() or {}
+        job_type = data.get('job_type')
+        params = data.get('params') or {}
+        
+        if job_type not in JOB_RUNNERS:
+            return jsonify({'error': f"Tipo de trabajo no válido. Opciones: {', '.join(JOB_RUNNERS)}"}), 400
+        if not isinstance(params, dict):
+            return jsonify({'error': 'params debe ser un objeto'}), 400
+        if job_type == 'summary':
+            try:
+                parse_report_dates(params.get('date_from'), params.get('date_to'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
+        try:
+            job, created = export_job_queue.submit(
+                current_app._get_current_object(),
+                job_type,
+                params,
+                JOB_RUNNERS[job_type],
+                get_export_dir(),
+                user_id=get_jwt_identity()
+            )
+        except JobQueueFull:
+            return jsonify({'error': 'La cola de exportaciones está llena, intenta más tarde'}), 503
+        
+        return jsonify(job.to_dict()), 202 if created else 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@reports_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_export_job(job_id):
+    try:
+        job = ExportJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        
+        return jsonify(job.to_dict()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/search', methods=['GET'])
+@jwt_required()
+@conditional_get
+def search_text_answers():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'El parámetro q es requerido'}), 400
+        
+        question_id = request.args.get('question_id', type=int)
+        area = request.args.get('area')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        
+        return jsonify(search_answers(query, question_id, area, page, per_page)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def job_filename(prefix, job_id, extension):
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id[:8]}.{extension}"
+
+def run_responses_job(params, export_dir, job_id, report_progress):
+    """Exportar respuestas completadas a CSV o JSON en el directorio de exportaciones"""
+    area = params.get('area')
+    include_personal_data = bool(params.get('include_personal_data', False))
+    format_type = params.get('format', 'csv')
+    
+    total_query = SurveyResponse.query.filter_by(status='completed')
+    if area:
+        total_query = total_query.filter_by(employee_area=area)
+    total = total_query.count()
+    
+    def on_batch(rows_written):
+        report_progress(rows_written / total * 100 if total else 100)
+    
+    if format_type == 'csv':
+        filename = job_filename('responses', job_id, 'csv')
+        with open(os.path.join(export_dir, filename), 'w', encoding='utf-8', newline='') as f:
+            for chunk in generate_responses_csv(area, include_personal_data, on_batch=on_batch):
+                f.write(chunk)
+        return filename
+    
+    names, columns = export_columns(include_personal_data)
+    query = db.session.query(*columns).filter(SurveyResponse.status == 'completed')
+    if area:
+        query = query.filter(SurveyResponse.employee_area == area)
+    
+    data = []
+    for row in query.order_by(SurveyResponse.id).yield_per(CSV_BATCH_SIZE):
+        data.append(dict(zip(names, row)))
+        if len(data) % CSV_BATCH_SIZE == 0:
+            on_batch(len(data))
+    
+    filename = job_filename('responses', job_id, 'json')
+    with open(os.path.join(export_dir, filename), 'w', encoding='utf-8') as f:
+        f.write(current_app.json.dumps({'responses': data, 'total_records': len(data)}))
+    return filename
+
+def run_summary_job(params, export_dir, job_id, report_progress):
+    """Generar el reporte resumen como archivo JSON"""
+    report_data = build_summary_report(params.get('date_from'), params.get('date_to'))
+    filename = job_filename('summary', job_id, 'json')
+    with open(os.path.join(export_dir, filename), 'w', encoding='utf-8') as f:
+        f.write(current_app.json.dumps({'report_data': report_data}))
+    return filename
+
+def run_detailed_job(params, export_dir, job_id, report_progress):
+    """Generar el reporte detallado de una sección como archivo JSON"""
+    report = build_detailed_report(params.get('section'), params.get('area'))
+    filename = job_filename('detailed', job_id, 'json')
+    with open(os.path.join(export_dir, filename), 'w', encoding='utf-8') as f:
+        f.write(current_app.json.dumps(report))
+    return filename
+
+JOB_RUNNERS = {
+    'responses': run_responses_job,
+    'summary': run_summary_job,
+    'detailed': run_detailed_job,
+}
+
 @reports_bp.route('/analytics', methods=['GET'])
 @jwt_required()
+@cached_result
 def get_analytics_data():
     try:
+        granularity = request.args.get('granularity', 'month')
+        question_key = request.args.get('question', DEFAULT_TREND_QUESTION)
+        area = request.args.get('area')
+        
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': f"granularity debe ser uno de: {', '.join(GRANULARITIES)}"}), 400
+        if question_key not in LIKERT_SCORES:
+            return jsonify({'error': f"question debe ser uno de: {', '.join(LIKERT_SCORES)}"}), 400
+        
         # Datos para gráficos del dashboard
         analytics_data = {
             'satisfaction_trend': [
-                {'month': 'Enero', 'score': 3.2},
-                {'month': 'Febrero', 'score': 3.4},
-                {'month': 'Marzo', 'score': 3.8},
-                {'month': 'Abril', 'score': 3.7},
-                {'month': 'Mayo', 'score': 3.9}
+                {'period': point['date'], 'score': point['average'], 'count': point['count']}
+                for point in satisfaction_trend(granularity, question_key, area=area)
             ],
             'area_performance': [
                 {'area': 'Mecánica', 'satisfaction': 4.1, 'productivity': 85},
@@ -242,7 +596,7 @@ def get_analytics_data():
         }
         
         return jsonify(analytics_data), 200
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
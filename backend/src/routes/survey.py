@@ -1,45 +1,87 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from src.models.user import SurveyTemplate, Question, SurveyResponse, QuestionAnswer
 from src.models.database import db
+from src.services.template_cache import template_cache
+from src.services.aggregates import apply_answer_changes, increment_response_counts, mark_response_completed
+from src.services.data_version import bump_data_version
+from src.services.question_registry import question_registry
+from src.services.impediment_classifier import classify_impediment
+from src.services.answer_buffer import answer_buffer
+from src.services.satisfaction_trends import record_completed_response, apply_answer_rollup_changes
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from collections import defaultdict
 import json
 
 survey_bp = Blueprint('survey', __name__)
 
+@survey_bp.record_once
+def init_answer_buffer(state):
+    answer_buffer.init_app(state.app, write_buffered_answers)
+
 @survey_bp.route('/template', methods=['GET'])
 def get_survey_template():
     try:
-        # Obtener la plantilla activa
-        template = SurveyTemplate.query.filter_by(is_active=True).first()
-        
-        if not template:
-            # Crear plantilla por defecto si no existe
-            template = create_default_template()
+        # Servir desde el cache en proceso; un If-None-Match válido solo consulta cada pocos segundos
+        # qué plantilla está activa
+        entry = template_cache.get_active()
+        if entry and request.if_none_match.contains_weak(entry['etag']):
+            return template_response(entry, status=304)
         
-        # Obtener preguntas organizadas por sección
-        questions = Question.query.filter_by(survey_template_id=template.id).order_by(Question.order_index).all()
+        if not entry:
+            entry = build_template_entry()
+            if not entry:
+                return jsonify({'error': 'No hay plantilla de encuesta activa'}), 404
+            if request.if_none_match.contains_weak(entry['etag']):
+                return template_response(entry, status=304)
         
-        # Organizar preguntas por sección
-        sections = {}
-        for question in questions:
-            section_name = question.section_name
-            if section_name not in sections:
-                sections[section_name] = []
-            sections[section_name].append(question.to_dict())
-        
-        # Convertir a formato de lista
-        sections_list = [{'name': name, 'questions': questions} for name, questions in sections.items()]
-        
-        return jsonify({
-            'id': template.id,
-            'title': template.title,
-            'description': template.description,
-            'sections': sections_list
-        }), 200
+        return template_response(entry)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_template_entry():
+    """Serializar la plantilla activa y guardarla en el cache (None si no hay plantilla)"""
+    # Obtener la plantilla activa; se aprovisiona con `flask init-db`, nunca en la petición
+    template = SurveyTemplate.query.filter_by(is_active=True).order_by(SurveyTemplate.id).first()
+    if not template:
+        return None
+    
+    # Obtener preguntas organizadas por sección
+    questions = Question.query.filter_by(survey_template_id=template.id).order_by(Question.order_index).all()
+    
+    # Organizar preguntas por sección
+    sections = {}
+    for question in questions:
+        section_name = question.section_name
+        if section_name not in sections:
+            sections[section_name] = []
+        sections[section_name].append(question.to_dict())
+    
+    # Convertir a formato de lista
+    sections_list = [{'name': name, 'questions': questions} for name, questions in sections.items()]
+    
+    body = current_app.json.dumps({
+        'id': template.id,
+        'title': template.title,
+        'description': template.description,
+        'sections': sections_list
+    })
+    return template_cache.store(template.id, template.version, body)
+
+def template_response(entry, status=200):
+    """Construir la respuesta de la plantilla con ETag fuerte y Cache-Control"""
+    response = current_app.response_class(
+        entry['body'] if status == 200 else None,
+        status=status,
+        mimetype='application/json'
+    )
+    response.set_etag(entry['etag'])
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('TEMPLATE_CACHE_MAX_AGE', 60)
+    response.cache_control.must_revalidate = True
+    return response
+
 @survey_bp.route('/start', methods=['POST'])
 def start_survey():
     try:
@@ -61,6 +103,8 @@ def start_survey():
         )
         
         db.session.add(response)
+        increment_response_counts(template.id, total=1)
+        bump_data_version()
         db.session.commit()
         
         return jsonify({
@@ -89,35 +133,16 @@ def save_answer():
         if not question:
             return jsonify({'error': 'Pregunta no encontrada'}), 404
         
-        # Buscar respuesta existente o crear nueva
-        existing_answer = QuestionAnswer.query.filter_by(
-            survey_response_id=response_id,
-            question_id=question_id
-        ).first()
-        
-        if existing_answer:
-            # Actualizar respuesta existente
-            if isinstance(answer, (dict, list)):
-                existing_answer.answer_json = answer
-            elif isinstance(answer, (int, float)):
-                existing_answer.answer_numeric = answer
-            else:
-                existing_answer.answer_text = str(answer)
-        else:
-            # Crear nueva respuesta
-            new_answer = QuestionAnswer(
-                survey_response_id=response_id,
-                question_id=question_id
-            )
-            
-            if isinstance(answer, (dict, list)):
-                new_answer.answer_json = answer
-            elif isinstance(answer, (int, float)):
-                new_answer.answer_numeric = answer
-            else:
-                new_answer.answer_text = str(answer)
-            
-            db.session.add(new_answer)
+        # Modo write-behind: se confirma al encolar y el commit se agrupa en segundo plano
+        if answer_buffer.enabled() and answer_buffer.enqueue(response.id, question.id, answer):
+            return jsonify({
+                'success': True,
+                'message': 'Respuesta guardada',
+                'buffered': True
+            }), 200
+        
+        # Upsert nativo: una sola sentencia indexada por (respuesta, pregunta)
+        upsert_answers(response, [(question_id, answer)])
         
         db.session.commit()
         
@@ -129,6 +154,77 @@ def save_answer():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def item_question_id(item):
+    """Id de pregunta de un ítem del lote, o None si no es un entero"""
+    question_id = item.get('question_id') if isinstance(item, dict) else None
+    if isinstance(question_id, int) and not isinstance(question_id, bool):
+        return question_id
+    return None
+
+@survey_bp.route('/answers', methods=['POST'])
+def save_answers():
+    try:
+        data = request.get_json()
+        response_id = data.get('response_id')
+        items = data.get('answers')
+        
+        if not isinstance(items, list):
+            return jsonify({'error': 'Se requiere una lista de respuestas'}), 400
+        
+        response = SurveyResponse.query.get(response_id)
+        if not response:
+            return jsonify({'error': 'Respuesta no encontrada'}), 404
+        
+        # Lo pendiente en el buffer es más antiguo que este lote: escribirlo antes para que no lo pise al vaciarse
+        if answer_buffer.enabled():
+            answer_buffer.flush(response.id)
+        
+        # Solo ids enteros: cualquier otro valor (lista, objeto, texto) es un ítem inválido, no un error 500
+        item_ids = [item_question_id(item) for item in items]
+        question_ids = {question_id for question_id in item_ids if question_id is not None}
+        
+        # Validar todas las preguntas con una sola consulta IN
+        valid_ids = set()
+        if question_ids:
+            valid_ids = {
+                row[0] for row in db.session.query(Question.id).filter(Question.id.in_(question_ids)).all()
+            }
+        
+        results = []
+        pending = {}
+        saved = 0
+        for item, question_id in zip(items, item_ids):
+            if question_id not in valid_ids:
+                results.append({
+                    'question_id': item.get('question_id') if isinstance(item, dict) else None,
+                    'success': False,
+                    'error': 'Pregunta no encontrada'
+                })
+                continue
+            
+            # Si una pregunta se repite en el lote, prevalece la última respuesta
+            pending.pop(question_id, None)
+            pending[question_id] = item.get('answer')
+            results.append({'question_id': question_id, 'success': True})
+            saved += 1
+        
+        # Sin respuestas válidas no se escribe nada (ni cambia la versión de los datos)
+        if pending:
+            upsert_answers(response, pending.items())
+            
+            # Una sola transacción para todo el lote
+            db.session.commit()
+        
+        return jsonify({
+            'success': saved == len(items),
+            'saved': saved,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @survey_bp.route('/complete', methods=['POST'])
 def complete_survey():
     try:
@@ -139,8 +235,22 @@ def complete_survey():
         if not response:
             return jsonify({'error': 'Respuesta no encontrada'}), 404
         
-        response.status = 'completed'
-        response.completed_at = datetime.utcnow()
+        # Las respuestas en el buffer deben estar escritas antes de marcar la encuesta completada
+        answer_buffer.flush(response.id)
+        
+        completed_at = datetime.utcnow()
+        
+        # Transición atómica para no contabilizar dos veces la misma encuesta
+        transitioned = SurveyResponse.query.filter(
+            SurveyResponse.id == response.id,
+            SurveyResponse.status != 'completed'
+        ).update({'status': 'completed', 'completed_at': completed_at}, synchronize_session=False)
+        
+        # Completar de nuevo no mueve completed_at: la encuesta ya está contada en sus buckets
+        if transitioned:
+            mark_response_completed(response)
+            record_completed_response(response, completed_at)
+            bump_data_version()
         
         db.session.commit()
         
@@ -152,180 +262,72 @@ def complete_survey():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def create_default_template():
-    """Crear plantilla de encuesta por defecto"""
-    template = SurveyTemplate(
-        title='Encuesta Organizacional PowerCars 2025',
-        description='Encuesta para mapear la estructura organizacional y identificar áreas de mejora',
-        created_by=1
-    )
+def answer_column(answer):
+    """Determinar la columna donde se guarda la respuesta según su tipo"""
+    if isinstance(answer, (dict, list)):
+        return 'answer_json', answer
+    elif isinstance(answer, (int, float)):
+        return 'answer_numeric', answer
+    else:
+        return 'answer_text', str(answer)
+
+def upsert_answers(response, answers):
+    """Insertar o actualizar respuestas con INSERT ... ON CONFLICT DO UPDATE
+
+    Los contadores agregados se ajustan en la misma transacción.
+    """
+    rows_by_column = defaultdict(list)
+    new_texts = {}
+    impediment_details_question_id = question_registry.get('impediment_details')
+    for question_id, answer in answers:
+        column, value = answer_column(answer)
+        row = {
+            'survey_response_id': response.id,
+            'question_id': question_id,
+            column: value
+        }
+        if column == 'answer_text':
+            new_texts[question_id] = value
+            # Clasificar el impedimento una sola vez, al guardarlo
+            row['answer_category'] = (
+                classify_impediment(value) if question_id == impediment_details_question_id else None
+            )
+        rows_by_column[column].append(row)
     
-    db.session.add(template)
-    db.session.flush()  # Para obtener el ID
+    # La primera escritura abre BEGIN IMMEDIATE: con el lock tomado, los valores previos y el
+    # estado de la encuesta no pueden cambiar hasta el commit (sin esto dos guardados
+    # concurrentes leen el mismo valor anterior y los contadores se desvían)
+    bump_data_version()
+    db.session.refresh(response, ['status', 'completed_at'])
     
-    # Preguntas de la encuesta
-    questions_data = [
-        # Sección 1: Información Personal
-        {
-            'section': 'Información Personal',
-            'text': '¿Cuál es tu nombre completo?',
-            'type': 'text',
-            'required': True,
-            'order': 1
-        },
-        {
-            'section': 'Información Personal',
-            'text': '¿En qué área trabajas?',
-            'type': 'select',
-            'options': ['Mecánica', 'Administración', 'Ventas', 'Limpieza', 'Seguridad', 'Otro'],
-            'required': True,
-            'order': 2
-        },
-        {
-            'section': 'Información Personal',
-            'text': '¿Cuánto tiempo llevas trabajando en PowerCars?',
-            'type': 'radio',
-            'options': ['Menos de 6 meses', '6-12 meses', '1-3 años', '3-5 años', 'Más de 5 años'],
-            'required': True,
-            'order': 3
-        },
-        
-        # Sección 2: Rol y Responsabilidades
-        {
-            'section': 'Rol y Responsabilidades',
-            'text': '¿Cuál es tu rol específico en PowerCars?',
-            'type': 'text',
-            'required': True,
-            'order': 4
-        },
-        {
-            'section': 'Rol y Responsabilidades',
-            'text': '¿Quién es tu líder directo o supervisor inmediato?',
-            'type': 'text',
-            'required': True,
-            'order': 5
-        },
-        {
-            'section': 'Rol y Responsabilidades',
-            'text': 'Describe tus principales funciones diarias:',
-            'type': 'textarea',
-            'required': True,
-            'order': 6
-        },
-        
-        # Sección 3: Impedimentos y Mejoras
-        {
-            'section': 'Impedimentos y Mejoras',
-            'text': '¿Existe algún impedimento principal para realizar tus funciones eficientemente?',
-            'type': 'radio',
-            'options': ['Sí', 'No'],
-            'required': True,
-            'order': 7
-        },
-        {
-            'section': 'Impedimentos y Mejoras',
-            'text': 'Si respondiste sí, especifica cuáles impedimentos enfrentas:',
-            'type': 'textarea',
-            'required': False,
-            'order': 8
-        },
-        {
-            'section': 'Impedimentos y Mejoras',
-            'text': '¿Crees que se pueden mejorar los protocolos actuales de trabajo?',
-            'type': 'radio',
-            'options': ['Sí', 'No', 'No estoy seguro'],
-            'required': True,
-            'order': 9
-        },
-        
-        # Sección 4: Ambiente Laboral
-        {
-            'section': 'Ambiente Laboral',
-            'text': '¿Cómo calificarías el ambiente laboral en PowerCars?',
-            'type': 'radio',
-            'options': ['Excelente', 'Muy bueno', 'Bueno', 'Regular', 'Malo'],
-            'required': True,
-            'order': 10
-        },
-        {
-            'section': 'Ambiente Laboral',
-            'text': '¿Te sientes valorado por tu trabajo?',
-            'type': 'radio',
-            'options': ['Siempre', 'Frecuentemente', 'A veces', 'Raramente', 'Nunca'],
-            'required': True,
-            'order': 11
-        },
-        {
-            'section': 'Ambiente Laboral',
-            'text': '¿Cómo es la comunicación entre compañeros de trabajo?',
-            'type': 'radio',
-            'options': ['Excelente', 'Muy buena', 'Buena', 'Regular', 'Mala'],
-            'required': True,
-            'order': 12
-        },
-        
-        # Sección 5: Condiciones Laborales
-        {
-            'section': 'Condiciones Laborales',
-            'text': '¿Cómo evalúas los horarios de trabajo actuales?',
-            'type': 'radio',
-            'options': ['Muy adecuados', 'Adecuados', 'Aceptables', 'Inadecuados', 'Muy inadecuados'],
-            'required': True,
-            'order': 13
-        },
-        {
-            'section': 'Condiciones Laborales',
-            'text': '¿Tienes acceso a todas las herramientas necesarias para tu trabajo?',
-            'type': 'radio',
-            'options': ['Sí', 'No', 'Parcialmente'],
-            'required': True,
-            'order': 14
-        },
-        
-        # Sección 6: Experiencia General
-        {
-            'section': 'Experiencia General',
-            'text': 'En una escala del 1 al 10, ¿cómo calificarías tu experiencia trabajando en PowerCars?',
-            'type': 'scale',
-            'options': ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10'],
-            'required': True,
-            'order': 15
-        },
-        {
-            'section': 'Experiencia General',
-            'text': '¿Qué es lo que más te gusta de trabajar aquí?',
-            'type': 'textarea',
-            'required': False,
-            'order': 16
-        },
-        {
-            'section': 'Experiencia General',
-            'text': '¿Tienes ideas específicas que crees sería ideal implementar?',
-            'type': 'textarea',
-            'required': False,
-            'order': 17
-        },
-        {
-            'section': 'Experiencia General',
-            'text': 'Observaciones extras o comentarios adicionales:',
-            'type': 'textarea',
-            'required': False,
-            'order': 18
-        }
-    ]
+    # Valores previos (búsqueda indexada por el índice único) para ajustar los agregados
+    old_texts = {}
+    if new_texts:
+        old_texts = dict(db.session.query(QuestionAnswer.question_id, QuestionAnswer.answer_text).filter(
+            QuestionAnswer.survey_response_id == response.id,
+            QuestionAnswer.question_id.in_(new_texts)
+        ).all())
     
-    for q_data in questions_data:
-        question = Question(
-            survey_template_id=template.id,
-            section_name=q_data['section'],
-            question_text=q_data['text'],
-            question_type=q_data['type'],
-            options=q_data.get('options'),
-            is_required=q_data['required'],
-            order_index=q_data['order']
+    # Una sentencia por columna de destino para no pisar las otras columnas
+    for column, rows in rows_by_column.items():
+        stmt = sqlite_insert(QuestionAnswer)
+        set_ = {column: getattr(stmt.excluded, column)}
+        if column == 'answer_text':
+            set_['answer_category'] = stmt.excluded.answer_category
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['survey_response_id', 'question_id'],
+            set_=set_
         )
-        db.session.add(question)
+        db.session.execute(stmt, rows)
     
-    db.session.commit()
-    return template
+    text_changes = [(question_id, old_texts.get(question_id), value) for question_id, value in new_texts.items()]
+    apply_answer_changes(response.survey_template_id, text_changes, completed=response.status == 'completed')
+    # Una encuesta ya completada que cambia una respuesta Likert ajusta sus buckets de tendencia
+    apply_answer_rollup_changes(response, text_changes)
+
+def write_buffered_answers(batch):
+    """Persistir un lote del buffer write-behind: {response_id: [(question_id, answer)]}"""
+    responses = SurveyResponse.query.filter(SurveyResponse.id.in_(batch)).all()
+    for response in responses:
+        upsert_answers(response, batch[response.id])
 
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.database import db
+from src.models.user import AnswerAggregate, ResponseAggregate
+from src.services.data_version import bump_data_version
+
+def apply_answer_changes(template_id, changes, completed=False):
+    """Ajustar los contadores por valor de respuesta dentro de la transacción actual
+
+    changes es un iterable de (question_id, valor_anterior, valor_nuevo); None indica
+    que la respuesta no tenía (o ya no tiene) texto contabilizable.
+    """
+    deltas = defaultdict(int)
+    for question_id, old_value, new_value in changes:
+        if old_value == new_value:
+            continue
+        if old_value is not None:
+            deltas[(question_id, old_value)] -= 1
+        if new_value is not None:
+            deltas[(question_id, new_value)] += 1
+    
+    rows = [
+        {
+            'template_id': template_id,
+            'question_id': question_id,
+            'answer_value': answer_value,
+            'total_count': delta,
+            'completed_count': delta if completed else 0
+        }
+        for (question_id, answer_value), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+    
+    stmt = sqlite_insert(AnswerAggregate)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['template_id', 'question_id', 'answer_value'],
+        set_={
+            'total_count': AnswerAggregate.total_count + stmt.excluded.total_count,
+            'completed_count': AnswerAggregate.completed_count + stmt.excluded.completed_count
+        }
+    )
+    db.session.execute(stmt, rows)
+
+def increment_response_counts(template_id, total=0, completed=0):
+    """Sumar encuestas iniciadas y/o completadas al contador de la plantilla"""
+    stmt = sqlite_insert(ResponseAggregate).values(
+        template_id=template_id,
+        total_count=total,
+        completed_count=completed
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['template_id'],
+        set_={
+            'total_count': ResponseAggregate.total_count + stmt.excluded.total_count,
+            'completed_count': ResponseAggregate.completed_count + stmt.excluded.completed_count
+        }
+    )
+    db.session.execute(stmt)
+
+def mark_response_completed(response):
+    """Contabilizar como completadas las respuestas ya guardadas de una encuesta"""
+    db.session.execute(text("""
+        UPDATE answer_aggregates
+        SET completed_count = completed_count + 1
+        WHERE template_id = :template_id
+          AND (question_id, answer_value) IN (
+              SELECT question_id, answer_text FROM question_answers
+              WHERE survey_response_id = :response_id AND answer_text IS NOT NULL
+          )
+    """), {'template_id': response.survey_template_id, 'response_id': response.id})
+    increment_response_counts(response.survey_template_id, completed=1)
+
+def rebuild_aggregates():
+    """Regenerar las tablas de agregados a partir de los datos crudos"""
+    db.session.execute(text("DELETE FROM answer_aggregates"))
+    db.session.execute(text("DELETE FROM response_aggregates"))
+    db.session.execute(text("""
+        INSERT INTO answer_aggregates (template_id, question_id, answer_value, total_count, completed_count)
+        SELECT sr.survey_template_id, qa.question_id, qa.answer_text,
+               COUNT(*), SUM(CASE WHEN sr.status = 'completed' THEN 1 ELSE 0 END)
+        FROM question_answers qa
+        JOIN survey_responses sr ON sr.id = qa.survey_response_id
+        WHERE qa.answer_text IS NOT NULL
+        GROUP BY sr.survey_template_id, qa.question_id, qa.answer_text
+    """))
+    db.session.execute(text("""
+        INSERT INTO response_aggregates (template_id, total_count, completed_count)
+        SELECT survey_template_id, COUNT(*), SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END)
+        FROM survey_responses
+        GROUP BY survey_template_id
+    """))
+    bump_data_version()
+    db.session.commit()
+
+def answer_distributions(question_ids):
+    """Conteo de respuestas por valor para varias preguntas en una sola consulta"""
+    distributions = {question_id: [] for question_id in question_ids}
+    if not distributions:
+        return distributions
+    
+    rows = db.session.query(
+        AnswerAggregate.question_id,
+        AnswerAggregate.answer_value,
+        func.sum(AnswerAggregate.total_count).label('count')
+    ).filter(
+        AnswerAggregate.question_id.in_(distributions),
+        AnswerAggregate.total_count > 0
+    ).group_by(AnswerAggregate.question_id, AnswerAggregate.answer_value).all()
+    
+    for question_id, answer_value, count in rows:
+        distributions[question_id].append((answer_value, count))
+    return distributions
+
+def response_totals():
+    """Total de encuestas iniciadas y completadas"""
+    total, completed = db.session.query(
+        func.coalesce(func.sum(ResponseAggregate.total_count), 0),
+        func.coalesce(func.sum(ResponseAggregate.completed_count), 0)
+    ).one()
+    return total, completed
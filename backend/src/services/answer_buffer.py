@@ -0,0 +1,168 @@
+import atexit
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from sqlalchemy.engine import make_url
+from src.models.database import db
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto; se ajustan con ANSWER_BUFFER_SIZE, ANSWER_FLUSH_INTERVAL_MS y ANSWER_FLUSH_BATCH
+DEFAULT_BUFFER_SIZE = 5000
+DEFAULT_FLUSH_INTERVAL_MS = 200
+DEFAULT_FLUSH_BATCH = 200
+
+class AnswerWriteBuffer:
+    """Buffer write-behind de respuestas con coalescencia y commit agrupado
+
+    Las respuestas aceptadas se escriben a lo sumo ANSWER_FLUSH_INTERVAL_MS después
+    (cota de durabilidad: ese es el máximo que se pierde si el proceso muere).
+    El buffer vive en el proceso: con ANSWER_WRITE_BEHIND la aplicación debe correr en un
+    solo worker, porque /complete solo puede vaciar el buffer del proceso que lo atiende.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = OrderedDict()  # (response_id, question_id) -> respuesta
+        self._thread = None
+        self._stopping = False
+        self._app = None
+        self._writer = None
+        self._owner_pid = None
+        self._process_lock_file = None
+
+    def init_app(self, app, writer):
+        """Registrar la aplicación y la función que persiste un lote {response_id: [(question_id, answer)]}"""
+        self._app = app
+        self._writer = writer
+        self._max_size = app.config.get('ANSWER_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+        self._interval = app.config.get('ANSWER_FLUSH_INTERVAL_MS', DEFAULT_FLUSH_INTERVAL_MS) / 1000
+        self._batch = app.config.get('ANSWER_FLUSH_BATCH', DEFAULT_FLUSH_BATCH)
+        self._release_process_lock()
+        if app.config.get('ANSWER_WRITE_BEHIND', False):
+            self._acquire_process_lock(app)
+        atexit.register(self.shutdown)
+
+    def _acquire_process_lock(self, app):
+        """Tomar el lock de un solo proceso junto a la base; falla si otro worker ya usa el buffer"""
+        self._owner_pid = os.getpid()
+        try:
+            import fcntl
+        except ImportError:
+            return  # Sin fcntl (Windows) no hay lock entre procesos
+        
+        database = make_url(app.config['SQLALCHEMY_DATABASE_URI']).database
+        if not database or database == ':memory:':
+            return
+        
+        lock_file = open(os.path.abspath(database) + '.write-behind.lock', 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(
+                'ANSWER_WRITE_BEHIND requiere un solo proceso y otro proceso ya usa el buffer '
+                'sobre esta base (ejecutar con un solo worker, por ejemplo gunicorn -w 1 --threads N)'
+            )
+        # El archivo queda abierto mientras viva el proceso; el sistema libera el lock al terminar
+        self._process_lock_file = lock_file
+
+    def _release_process_lock(self):
+        if self._process_lock_file is not None:
+            self._process_lock_file.close()
+            self._process_lock_file = None
+
+    def enabled(self):
+        if self._app is None or not self._app.config.get('ANSWER_WRITE_BEHIND', False):
+            return False
+        if self._owner_pid != os.getpid():
+            # Proceso hijo de un fork (gunicorn --preload): el lock es del padre, se escribe en línea
+            return False
+        return True
+
+    def enqueue(self, response_id, question_id, answer):
+        """Encolar una respuesta; retorna False si el buffer está lleno y hay que escribir en línea"""
+        key = (response_id, question_id)
+        with self._lock:
+            if key in self._pending:
+                # Coalescer: prevalece la última respuesta para la misma pregunta
+                self._pending.move_to_end(key)
+            elif len(self._pending) >= self._max_size:
+                return False
+            self._pending[key] = answer
+            self._ensure_thread()
+            if len(self._pending) == 1 or len(self._pending) >= self._batch:
+                self._wakeup.notify()
+        return True
+
+    def flush(self, response_id=None):
+        """Escribir ya lo pendiente (solo de una respuesta si se indica) en una transacción"""
+        with self._flush_lock:
+            with self._lock:
+                if response_id is None:
+                    entries, self._pending = self._pending, OrderedDict()
+                else:
+                    keys = [key for key in self._pending if key[0] == response_id]
+                    entries = OrderedDict((key, self._pending.pop(key)) for key in keys)
+            if entries:
+                self._write(entries)
+            return len(entries)
+
+    def _write(self, entries):
+        batch = defaultdict(list)
+        for (response_id, question_id), answer in entries.items():
+            batch[response_id].append((question_id, answer))
+        
+        try:
+            self._writer(batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Reintentar por respuesta para que un registro inválido no descarte todo el lote
+            for response_id, answers in batch.items():
+                try:
+                    self._writer({response_id: answers})
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('No se pudieron guardar %d respuestas de la encuesta %s', len(answers), response_id)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='answer-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending and not self._stopping:
+                    self._wakeup.wait()
+                if self._stopping and not self._pending:
+                    return
+                if len(self._pending) < self._batch and not self._stopping:
+                    # Esperar el intervalo para agrupar más escrituras en el mismo commit
+                    self._wakeup.wait(self._interval)
+            
+            with self._app.app_context():
+                try:
+                    self.flush()
+                finally:
+                    db.session.remove()
+
+    def shutdown(self, timeout=10):
+        """Vaciar el buffer y detener el hilo de escritura (al apagar el proceso)"""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        if self._pending and self._app is not None:
+            with self._app.app_context():
+                self.flush()
+
+answer_buffer = AnswerWriteBuffer()
@@ -0,0 +1,140 @@
+import html
+import re
+from sqlalchemy import text
+from src.models.database import db
+
+# Tipos de pregunta cuyas respuestas se indexan para búsqueda
+SEARCHABLE_TYPES = ('text', 'textarea')
+# Marcadores del fragmento (caracteres de uso privado, no HTML): se reemplazan por <mark> tras escapar el texto
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+
+_SEARCHABLE_CONDITION = """
+    (SELECT question_type FROM questions WHERE id = {row}.question_id) IN ('text', 'textarea')
+    AND {row}.answer_text IS NOT NULL
+"""
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS answer_search USING fts5(
+        answer_text,
+        question_id UNINDEXED,
+        survey_response_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS answer_search_after_insert
+    AFTER INSERT ON question_answers
+    WHEN {_SEARCHABLE_CONDITION.format(row='NEW')}
+    BEGIN
+        INSERT INTO answer_search (rowid, answer_text, question_id, survey_response_id)
+        VALUES (NEW.id, NEW.answer_text, NEW.question_id, NEW.survey_response_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS answer_search_after_update
+    AFTER UPDATE OF answer_text ON question_answers
+    BEGIN
+        DELETE FROM answer_search WHERE rowid = OLD.id;
+        INSERT INTO answer_search (rowid, answer_text, question_id, survey_response_id)
+        SELECT NEW.id, NEW.answer_text, NEW.question_id, NEW.survey_response_id
+        WHERE {_SEARCHABLE_CONDITION.format(row='NEW')};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS answer_search_after_delete
+    AFTER DELETE ON question_answers
+    BEGIN
+        DELETE FROM answer_search WHERE rowid = OLD.id;
+    END
+    """,
+]
+
+def create_search_index():
+    """Crear la tabla FTS5 y los triggers que la mantienen sincronizada"""
+    for statement in SCHEMA_STATEMENTS:
+        db.session.execute(text(statement))
+
+def rebuild_search_index():
+    """Reconstruir el índice de búsqueda desde cero a partir de question_answers"""
+    create_search_index()
+    db.session.execute(text("DELETE FROM answer_search"))
+    db.session.execute(text(f"""
+        INSERT INTO answer_search (rowid, answer_text, question_id, survey_response_id)
+        SELECT qa.id, qa.answer_text, qa.question_id, qa.survey_response_id
+        FROM question_answers qa
+        JOIN questions q ON q.id = qa.question_id
+        WHERE q.question_type IN {SEARCHABLE_TYPES!r} AND qa.answer_text IS NOT NULL
+    """))
+    db.session.execute(text("INSERT INTO answer_search (answer_search) VALUES ('optimize')"))
+    db.session.commit()
+
+def build_match_query(query):
+    """Convertir el texto del usuario en una consulta FTS5 segura (términos con prefijo, AND implícito)"""
+    terms = re.findall(r'\w+', query or '')
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+def highlight_snippet(snippet):
+    """Escapar el texto de la respuesta (lo escribe cualquier encuestado) y resaltar las coincidencias con <mark>"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+def search_answers(query, question_id=None, area=None, page=1, per_page=20):
+    """Buscar respuestas de texto libre ordenadas por relevancia (bm25), con fragmentos resaltados"""
+    match = build_match_query(query)
+    if not match:
+        return {'results': [], 'total': 0, 'page': page, 'per_page': per_page}
+    
+    filters = ''
+    params = {
+        'match': match,
+        'limit': per_page,
+        'offset': (page - 1) * per_page,
+        'match_start': MATCH_START,
+        'match_end': MATCH_END
+    }
+    if question_id:
+        filters += ' AND s.question_id = :question_id'
+        params['question_id'] = question_id
+    if area:
+        filters += ' AND sr.employee_area = :area'
+        params['area'] = area
+    
+    base = f"""
+        FROM answer_search s
+        JOIN survey_responses sr ON sr.id = s.survey_response_id
+        WHERE answer_search MATCH :match{filters}
+    """
+    total = db.session.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+    rows = db.session.execute(text(f"""
+        SELECT s.rowid AS answer_id,
+               s.survey_response_id,
+               s.question_id,
+               q.question_text,
+               sr.employee_area,
+               snippet(answer_search, 0, :match_start, :match_end, '…', 16) AS snippet,
+               bm25(answer_search) AS rank
+        {base.replace('WHERE', 'JOIN questions q ON q.id = s.question_id WHERE', 1)}
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+    
+    return {
+        'results': [
+            {
+                'answer_id': row.answer_id,
+                'response_id': row.survey_response_id,
+                'question_id': row.question_id,
+                'question_text': row.question_text,
+                'area': row.employee_area,
+                'snippet': highlight_snippet(row.snippet),
+                'rank': round(row.rank, 4)
+            }
+            for row in rows
+        ],
+        'total': total,
+        'page': page,
+        'per_page': per_page
+    }
@@ -0,0 +1,44 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se negocia gzip
+    brotli = None
+
+# Valores por defecto; se ajustan con COMPRESS_MIN_SIZE, COMPRESS_GZIP_LEVEL y COMPRESS_BROTLI_QUALITY
+DEFAULT_MIN_SIZE = 1024            # bytes; cuerpos menores no compensan el costo
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+
+def init_compression(app):
+    """Comprimir con br o gzip, según Accept-Encoding, las respuestas JSON grandes de la API"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None or response.content_length is None or response.content_length < min_size:
+            return response
+        
+        body = response.get_data()
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=brotli_quality))
+        else:
+            response.set_data(gzip.compress(body, compresslevel=gzip_level))
+        response.headers['Content-Encoding'] = encoding
+        
+        # La representación comprimida es otra: el ETag pasa a débil para seguir validando con If-None-Match
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
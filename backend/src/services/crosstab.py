@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+from sqlalchemy import text
+from src.models.database import db
+from src.services.data_version import current_data_version
+
+# Máximo de tablas cruzadas guardadas en el cache en proceso
+CROSSTAB_CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+CROSSTAB_SQL = text("""
+    SELECT a.answer_text AS row_value, b.answer_text AS column_value, COUNT(*) AS count
+    FROM question_answers a
+    JOIN question_answers b
+      ON b.survey_response_id = a.survey_response_id AND b.question_id = :column_question_id
+    JOIN survey_responses sr ON sr.id = a.survey_response_id
+    WHERE a.question_id = :row_question_id
+      AND a.answer_text IS NOT NULL
+      AND b.answer_text IS NOT NULL
+      AND (:completed_only = 0 OR sr.status = 'completed')
+    GROUP BY a.answer_text, b.answer_text
+""")
+
+def _score(value, scores):
+    if scores is not None:
+        return scores.get(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def crosstab(row_question_id, column_question_id, scores=None, completed_only=False):
+    """Tabla de contingencia entre dos preguntas, con conteos y medias por fila
+
+    Se calcula con un único self-join agrupado sobre question_answers. Las medias usan
+    scores (valor de columna -> puntaje) o, si no se indica, el valor numérico de la
+    respuesta; los valores sin puntaje cuentan en la tabla pero no en la media. El
+    resultado se guarda en cache hasta que cambie la versión de los datos.
+    """
+    cache_key = (
+        row_question_id,
+        column_question_id,
+        tuple(sorted(scores.items())) if scores else None,
+        bool(completed_only),
+        current_data_version()
+    )
+    with _cache_lock:
+        if cache_key in _cache:
+            _cache.move_to_end(cache_key)
+            return _cache[cache_key]
+    
+    rows = db.session.execute(CROSSTAB_SQL, {
+        'row_question_id': row_question_id,
+        'column_question_id': column_question_id,
+        'completed_only': 1 if completed_only else 0
+    }).all()
+    
+    table = {}
+    row_totals = {}
+    column_totals = {}
+    score_sums = {}
+    score_counts = {}
+    for row_value, column_value, count in rows:
+        table.setdefault(row_value, {})[column_value] = count
+        row_totals[row_value] = row_totals.get(row_value, 0) + count
+        column_totals[column_value] = column_totals.get(column_value, 0) + count
+        score = _score(column_value, scores)
+        if score is not None:
+            score_sums[row_value] = score_sums.get(row_value, 0) + score * count
+            score_counts[row_value] = score_counts.get(row_value, 0) + count
+    
+    result = {
+        'row_question_id': row_question_id,
+        'column_question_id': column_question_id,
+        'rows': sorted(table),
+        'columns': sorted(column_totals),
+        'table': table,
+        'row_totals': row_totals,
+        'column_totals': column_totals,
+        'means': {
+            row_value: score_sums[row_value] / score_counts[row_value]
+            for row_value in score_counts
+        },
+        'total': sum(row_totals.values())
+    }
+    
+    with _cache_lock:
+        _cache[cache_key] = result
+        while len(_cache) > CROSSTAB_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
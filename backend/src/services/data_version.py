@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.database import db
+from src.models.user import DataVersion
+
+def bump_data_version():
+    """Incrementar la versión global de los datos dentro de la transacción actual"""
+    stmt = sqlite_insert(DataVersion).values(id=1, version=1, updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={'version': DataVersion.version + 1, 'updated_at': stmt.excluded.updated_at}
+    )
+    db.session.execute(stmt)
+
+def current_data_version():
+    """Versión global de los datos; cambia cada vez que se guarda o completa una respuesta"""
+    version = db.session.query(DataVersion.version).filter(DataVersion.id == 1).scalar()
+    return version or 0
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from src.models.database import db
+from src.models.user import ExportJob
+from src.services.data_version import current_data_version
+
+# Valores por defecto; se pueden ajustar con EXPORT_JOB_WORKERS, EXPORT_JOB_QUEUE_SIZE, EXPORT_ARTIFACT_TTL
+# y EXPORT_JOB_TIMEOUT
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 20
+DEFAULT_ARTIFACT_TTL = 24 * 60 * 60
+DEFAULT_JOB_TIMEOUT = 60 * 60       # segundos; un trabajo en cola o en curso más antiguo se da por perdido
+
+class JobQueueFull(Exception):
+    """La cola de trabajos alcanzó su capacidad máxima"""
+
+class ExportJobQueue:
+    """Pool acotado de hilos para generar exportaciones fuera del hilo de la petición"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+
+    def _get_executor(self, app):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('EXPORT_JOB_WORKERS', DEFAULT_WORKERS),
+                    thread_name_prefix='export-job'
+                )
+            return self._executor
+
+    def submit(self, app, job_type, params, runner, export_dir, user_id=None):
+        """Encolar un trabajo, o devolver uno equivalente ya existente para la misma versión de datos
+
+        Retorna (job, created).
+        """
+        cleanup_expired_artifacts(export_dir, app.config.get('EXPORT_ARTIFACT_TTL', DEFAULT_ARTIFACT_TTL))
+        # Un trabajo de un proceso que murió quedaría en cola o en curso para siempre y la
+        # deduplicación lo devolvería en cada pedido
+        fail_stale_jobs(app.config.get('EXPORT_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT))
+        
+        params_hash = hashlib.sha256(
+            json.dumps({'job_type': job_type, 'params': params}, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        data_version = current_data_version()
+        
+        # Deduplicar: mismos parámetros y mismos datos producen el mismo archivo
+        existing = ExportJob.query.filter(
+            ExportJob.params_hash == params_hash,
+            ExportJob.data_version == data_version,
+            ExportJob.status.in_(['queued', 'running', 'done'])
+        ).order_by(ExportJob.created_at.desc()).first()
+        if existing:
+            return existing, False
+        
+        with self._lock:
+            if self._pending >= app.config.get('EXPORT_JOB_QUEUE_SIZE', DEFAULT_QUEUE_SIZE):
+                raise JobQueueFull()
+            self._pending += 1
+        
+        try:
+            job = ExportJob(
+                id=uuid.uuid4().hex,
+                job_type=job_type,
+                params=params,
+                params_hash=params_hash,
+                data_version=data_version,
+                created_by=user_id
+            )
+            db.session.add(job)
+            db.session.commit()
+            
+            self._get_executor(app).submit(self._run, app, job.id, runner, export_dir)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        
+        return job, True
+
+    def _run(self, app, job_id, runner, export_dir):
+        with app.app_context():
+            try:
+                job = ExportJob.query.get(job_id)
+                job.status = 'running'
+                db.session.commit()
+                
+                def report_progress(percentage):
+                    job.progress = max(0, min(100, int(percentage)))
+                    db.session.commit()
+                
+                job.filename = runner(job.params or {}, export_dir, job.id, report_progress)
+                job.status = 'done'
+                job.progress = 100
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                ExportJob.query.filter_by(id=job_id).update({
+                    'status': 'failed',
+                    'error': str(e),
+                    'finished_at': datetime.utcnow()
+                })
+                db.session.commit()
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._pending -= 1
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+export_job_queue = ExportJobQueue()
+
+def cleanup_expired_artifacts(export_dir, ttl):
+    """Eliminar los archivos generados más antiguos que el TTL y marcar sus trabajos como expirados"""
+    cutoff = time.time() - ttl
+    if os.path.isdir(export_dir):
+        for entry in os.scandir(export_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    
+    ExportJob.query.filter(
+        ExportJob.status == 'done',
+        ExportJob.finished_at < datetime.utcnow() - timedelta(seconds=ttl)
+    ).update({'status': 'expired'}, synchronize_session=False)
+    db.session.commit()
+
+def fail_stale_jobs(timeout=None):
+    """Marcar como fallidos los trabajos en cola o en curso creados hace más de timeout segundos
+
+    Sin timeout se marcan todos: al inicializar la base ningún proceso los está ejecutando.
+    """
+    query = ExportJob.query.filter(ExportJob.status.in_(['queued', 'running']))
+    if timeout is not None:
+        query = query.filter(ExportJob.created_at < datetime.utcnow() - timedelta(seconds=timeout))
+    count = query.update({
+        'status': 'failed',
+        'error': 'El trabajo se interrumpió antes de terminar',
+        'finished_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+    return count
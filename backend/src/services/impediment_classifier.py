@@ -0,0 +1,146 @@
+import re
+import threading
+import time
+from sqlalchemy import bindparam, event, func
+from src.models.database import db
+from src.models.user import ImpedimentRule, QuestionAnswer
+from src.services.org_graph import normalize_name
+from src.services.data_version import bump_data_version
+
+# Categoría asignada cuando ninguna regla coincide
+DEFAULT_CATEGORY = 'Otros'
+# Segundos que un proceso reutiliza las reglas compiladas antes de volver a leerlas
+DEFAULT_TTL_SECONDS = 30
+
+# Reglas iniciales: (categoría, raíz, prioridad)
+DEFAULT_RULES = [
+    ('Falta de herramientas/equipos', 'herramienta', 10),
+    ('Falta de herramientas/equipos', 'equip', 10),
+    ('Falta de capacitación', 'capacitacion', 20),
+    ('Falta de capacitación', 'entrenamiento', 20),
+    ('Problemas de comunicación', 'comunicacion', 30),
+    ('Sobrecarga de trabajo', 'tiempo', 40),
+    ('Sobrecarga de trabajo', 'sobrecarga', 40),
+]
+
+class ImpedimentClassifier:
+    """Clasificador de texto libre compilado en una sola expresión regular multi-patrón
+
+    Cada raíz coincide con cualquier palabra que empiece por ella, sobre el texto sin
+    acentos y en minúsculas. Si coinciden varias categorías gana la de menor prioridad.
+    """
+
+    def __init__(self, rules):
+        self._categories = []
+        alternatives = []
+        for category, keyword, priority in sorted(rules, key=lambda rule: rule[2]):
+            stem = normalize_name(keyword)
+            if not stem:
+                continue
+            alternatives.append(f'(?P<r{len(self._categories)}>{re.escape(stem)})')
+            self._categories.append((priority, category))
+        self._pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\w*') if alternatives else None
+
+    def classify(self, text):
+        """Categoría del texto, recorriéndolo una sola vez"""
+        if not text or self._pattern is None:
+            return DEFAULT_CATEGORY
+        best = None
+        for match in self._pattern.finditer(normalize_name(text)):
+            candidate = self._categories[int(match.lastgroup[1:])]
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+        return best[1] if best else DEFAULT_CATEGORY
+
+class ClassifierCache:
+    """Clasificador compilado por proceso a partir de la tabla de reglas
+
+    Los eventos del ORM solo invalidan el proceso que hace el cambio; el TTL acota cuánto
+    tarda un worker en ver reglas cambiadas desde otro proceso (por ejemplo la CLI).
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._classifier = None
+        self._loaded_at = 0
+
+    def get(self):
+        with self._lock:
+            if self._classifier is None or time.monotonic() - self._loaded_at >= self.ttl:
+                rules = db.session.query(
+                    ImpedimentRule.category, ImpedimentRule.keyword, ImpedimentRule.priority
+                ).filter(ImpedimentRule.is_active.is_(True)).all()
+                self._classifier = ImpedimentClassifier(rules)
+                self._loaded_at = time.monotonic()
+            return self._classifier
+
+    def invalidate(self):
+        with self._lock:
+            self._classifier = None
+
+classifier_cache = ClassifierCache()
+
+def _invalidate_classifier(mapper, connection, target):
+    classifier_cache.invalidate()
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(ImpedimentRule, _event_name, _invalidate_classifier)
+
+def classify_impediment(text):
+    return classifier_cache.get().classify(text)
+
+def seed_default_rules():
+    """Cargar las reglas iniciales si la tabla está vacía"""
+    if ImpedimentRule.query.first():
+        return
+    for category, keyword, priority in DEFAULT_RULES:
+        db.session.add(ImpedimentRule(category=category, keyword=keyword, priority=priority))
+    db.session.flush()
+
+def reclassify_answers(question_id, batch_size=500):
+    """Reclasificar por lotes todas las respuestas de una pregunta con las reglas vigentes"""
+    classifier_cache.invalidate()
+    classifier = classifier_cache.get()
+    
+    update = QuestionAnswer.__table__.update().where(
+        QuestionAnswer.__table__.c.id == bindparam('answer_id')
+    ).values(answer_category=bindparam('category'))
+    
+    last_id = 0
+    updated = 0
+    while True:
+        # Paginación por id: cada lote es un rango indexado
+        batch = db.session.query(QuestionAnswer.id, QuestionAnswer.answer_text).filter(
+            QuestionAnswer.question_id == question_id,
+            QuestionAnswer.id > last_id
+        ).order_by(QuestionAnswer.id).limit(batch_size).all()
+        if not batch:
+            break
+        
+        db.session.execute(update, [
+            {
+                'answer_id': answer_id,
+                'category': classifier.classify(answer_text) if answer_text is not None else None
+            }
+            for answer_id, answer_text in batch
+        ])
+        db.session.commit()
+        
+        updated += len(batch)
+        last_id = batch[-1][0]
+    
+    # Las categorías cambian el análisis de impedimentos guardado en cache
+    bump_data_version()
+    db.session.commit()
+    return updated
+
+def impediment_category_counts(question_id):
+    """Conteo de categorías guardadas, en orden de primera aparición"""
+    return db.session.query(
+        QuestionAnswer.answer_category,
+        func.count(QuestionAnswer.id)
+    ).filter(
+        QuestionAnswer.question_id == question_id,
+        QuestionAnswer.answer_text.isnot(None)
+    ).group_by(QuestionAnswer.answer_category).order_by(func.min(QuestionAnswer.id)).all()
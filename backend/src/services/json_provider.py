@@ -0,0 +1,109 @@
+import dataclasses
+import decimal
+import logging
+import time
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # Sin orjson (no instalado) se usa el json de la biblioteca estándar
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 'auto' usa orjson si está instalado; 'orjson' o 'stdlib' fuerzan uno (JSON_PROVIDER)
+DEFAULT_JSON_PROVIDER = 'auto'
+
+def _default(o):
+    """Tipos que ninguno de los serializadores soporta de forma nativa"""
+    if isinstance(o, Row):
+        # Filas de consultas por columnas: se serializan como arreglo, sin diccionario intermedio
+        return tuple(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Proveedor de la biblioteca estándar con fechas ISO 8601 (como orjson) y filas como arreglos"""
+
+    default = staticmethod(_default)
+
+class OrjsonProvider(JSONProvider):
+    """Proveedor basado en orjson: datetime nativo, claves no string y respuestas en bytes"""
+
+    sort_keys = True
+    compact = None
+    mimetype = 'application/json'
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=kwargs.get('default', _default), option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._options(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+JSON_PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'stdlib': StdlibJSONProvider,
+}
+
+def init_json_provider(app):
+    """Instalar el proveedor JSON configurado en JSON_PROVIDER"""
+    name = app.config.get('JSON_PROVIDER', DEFAULT_JSON_PROVIDER)
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+        if orjson is None:
+            # orjson está en requirements.txt; sin él las respuestas grandes se serializan más lento
+            logger.warning('orjson no está instalado; se usa el json de la biblioteca estándar')
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'JSON_PROVIDER no válido: {name}')
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER = 'orjson' requiere el paquete orjson")
+    app.json = JSON_PROVIDERS[name](app)
+    logger.info('Proveedor JSON: %s', name)
+
+def benchmark_json_providers(app, payloads, repeat=5):
+    """Mejor tiempo (ms) de codificar cada payload como respuesta con cada proveedor disponible
+
+    payloads es un dict nombre -> objeto; retorna {nombre: {proveedor: ms}}.
+    """
+    providers = {
+        name: provider_class(app)
+        for name, provider_class in JSON_PROVIDERS.items()
+        if name != 'orjson' or orjson is not None
+    }
+    results = {}
+    with app.app_context():
+        for payload_name, payload in payloads.items():
+            results[payload_name] = {}
+            for provider_name, provider in providers.items():
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    provider.response(payload).get_data()
+                    elapsed = (time.perf_counter() - start) * 1000
+                    best = elapsed if best is None else min(best, elapsed)
+                results[payload_name][provider_name] = best
+    return results
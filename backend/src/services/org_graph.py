@@ -0,0 +1,105 @@
+import statistics
+import unicodedata
+from collections import defaultdict, deque
+
+def normalize_name(name):
+    """Normalizar un nombre para comparar: sin acentos, minúsculas y espacios simples"""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+def build_org_graph(rows):
+    """Construir el organigrama a partir de filas (nombre, área, supervisor) en O(n)
+
+    Cada fila representa a un encuestado; el supervisor declarado se enlaza con el
+    encuestado del mismo nombre cuando existe. Devuelve profundidad real de gestión
+    (BFS desde las raíces), estadísticas de amplitud de control, ciclos, nodos
+    huérfanos y áreas sin jerarquía clara.
+    """
+    parent = {}
+    children = defaultdict(list)
+    labels = {}
+    areas = {}
+    respondents = {}
+
+    for name, area, supervisor in rows:
+        node = normalize_name(name)
+        if not node:
+            continue
+        respondents[node] = True
+        labels.setdefault(node, name)
+        areas.setdefault(node, area)
+        boss = normalize_name(supervisor)
+        if boss and boss != node:
+            parent[node] = boss
+            labels.setdefault(boss, supervisor)
+
+    for node, boss in parent.items():
+        children[boss].append(node)
+
+    nodes = set(labels)
+
+    # BFS desde las raíces (nodos sin supervisor) para obtener el nivel de cada nodo
+    depth = {}
+    queue = deque()
+    for node in nodes:
+        if node not in parent:
+            depth[node] = 0
+            queue.append(node)
+    while queue:
+        node = queue.popleft()
+        for child in children[node]:
+            if child not in depth:
+                depth[child] = depth[node] + 1
+                queue.append(child)
+
+    # Los nodos no alcanzados cuelgan de un ciclo; cada nodo tiene un solo padre,
+    # así que basta seguir los punteros con marcado de visita
+    cycles = []
+    in_cycle = set()
+    state = {}
+    for start in nodes:
+        if start in depth or start in state:
+            continue
+        path = []
+        node = start
+        while node is not None and node not in depth and node not in state:
+            state[node] = start
+            path.append(node)
+            node = parent.get(node)
+        if node is not None and state.get(node) == start:
+            cycle = path[path.index(node):]
+            in_cycle.update(cycle)
+            cycles.append([labels[member] for member in cycle])
+
+    spans = [len(children[node]) for node in nodes if children[node]]
+    manager_depths = [depth[node] for node in nodes if children[node] and node in depth]
+    management_levels = max(manager_depths) + 1 if manager_depths else 0
+    if cycles:
+        management_levels = max(management_levels, max(len(cycle) for cycle in cycles))
+
+    # Huérfanos: encuestados sin supervisor declarado y sin reportes directos
+    orphaned = [node for node in respondents if node not in parent and not children[node]]
+    orphaned_set = set(orphaned)
+
+    unclear_areas = {}
+    for node in respondents:
+        area = areas.get(node)
+        if area and (node in in_cycle or node in orphaned_set):
+            unclear_areas[area] = True
+
+    return {
+        'management_levels': management_levels,
+        'span_of_control': {
+            'supervisors': len(spans),
+            'min': min(spans) if spans else 0,
+            'max': max(spans) if spans else 0,
+            'average': round(statistics.mean(spans), 2) if spans else 0,
+            'median': statistics.median(spans) if spans else 0
+        },
+        'cycles': cycles,
+        'orphaned_nodes': [labels[node] for node in orphaned],
+        'areas_without_clear_hierarchy': list(unclear_areas)
+    }
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Valores por defecto; se ajustan con las claves PASSWORD_* y LOGIN_* de app.config
+DEFAULT_HASH_METHOD = 'bcrypt'      # o cualquier método de werkzeug ('scrypt', 'pbkdf2:sha256:600000')
+DEFAULT_BCRYPT_ROUNDS = 12
+DEFAULT_HASH_WORKERS = 2
+DEFAULT_HASH_QUEUE_SIZE = 16
+DEFAULT_HASH_TIMEOUT = 5            # segundos
+DEFAULT_MAX_PASSWORD_LENGTH = 128   # caracteres; acota el costo de cada verificación
+DEFAULT_LOGIN_WINDOW = 300          # segundos
+DEFAULT_LOGIN_MAX_PER_USERNAME = 5
+DEFAULT_LOGIN_MAX_PER_IP = 20
+# Claves (usuario o IP) con fallos recientes a partir de las cuales se purgan las vencidas
+MAX_TRACKED_KEYS = 10000
+
+class HashingBusy(Exception):
+    """El pool de hashing está saturado o la operación superó el tiempo máximo"""
+
+class PasswordTooLong(ValueError):
+    """La contraseña supera el largo máximo permitido"""
+
+def _config(key, default):
+    return current_app.config.get(key, default)
+
+def _password_bytes(password):
+    if len(password) > _config('PASSWORD_MAX_LENGTH', DEFAULT_MAX_PASSWORD_LENGTH):
+        raise PasswordTooLong('La contraseña es demasiado larga')
+    return password.encode('utf-8')
+
+def hash_password(password):
+    """Generar el hash con el método y costo configurados"""
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    if method == 'bcrypt':
+        rounds = _config('PASSWORD_BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS)
+        # bcrypt solo usa los primeros 72 bytes
+        return bcrypt.hashpw(_password_bytes(password)[:72], bcrypt.gensalt(rounds)).decode('ascii')
+    return generate_password_hash(password, method=method)
+
+def verify_password(password_hash, password):
+    """Verificar la contraseña contra un hash bcrypt o de werkzeug"""
+    if password_hash.startswith('$2'):
+        return bcrypt.checkpw(_password_bytes(password)[:72], password_hash.encode('ascii'))
+    _password_bytes(password)
+    return check_password_hash(password_hash, password)
+
+def needs_rehash(password_hash):
+    """Indicar si el hash guardado no usa el método o costo configurados"""
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    if method == 'bcrypt':
+        if not password_hash.startswith('$2'):
+            return True
+        return int(password_hash.split('$')[2]) != _config('PASSWORD_BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS)
+    return not password_hash.startswith(method + '$') and not password_hash.startswith(method + ':')
+
+_dummy_hashes = {}
+
+def dummy_password_hash():
+    """Hash de referencia para verificar usuarios inexistentes con el mismo costo que los reales"""
+    key = (_config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD), _config('PASSWORD_BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS))
+    if key not in _dummy_hashes:
+        _dummy_hashes[key] = hash_password('contraseña-de-referencia')
+    return _dummy_hashes[key]
+
+def check_credentials(password_hash, password):
+    """Verificar la contraseña; sin hash (usuario inexistente) se paga el mismo costo y se rechaza"""
+    valid = verify_password(password_hash or dummy_password_hash(), password)
+    return valid and password_hash is not None
+
+class PasswordHashPool:
+    """Pool acotado de hilos para verificar y generar hashes fuera del hilo de la petición"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _get_executor(self, app):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_HASH_WORKERS),
+                    thread_name_prefix='password-hash'
+                )
+                self._slots = threading.BoundedSemaphore(
+                    app.config.get('PASSWORD_HASH_QUEUE_SIZE', DEFAULT_HASH_QUEUE_SIZE)
+                )
+            return self._executor
+
+    def run(self, fn, *args):
+        """Ejecutar fn en el pool; HashingBusy si la cola está llena o se supera el timeout"""
+        app = current_app._get_current_object()
+        executor = self._get_executor(app)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        
+        def task():
+            try:
+                with app.app_context():
+                    return fn(*args)
+            finally:
+                self._slots.release()
+        
+        future = executor.submit(task)
+        try:
+            return future.result(timeout=app.config.get('PASSWORD_HASH_TIMEOUT', DEFAULT_HASH_TIMEOUT))
+        except FutureTimeoutError:
+            raise HashingBusy()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+password_hash_pool = PasswordHashPool()
+
+class LoginThrottle:
+    """Límite de intentos fallidos de login por usuario y por IP en una ventana deslizante"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = {}
+
+    def _recent(self, key, now, window):
+        attempts = self._failures.get(key)
+        if attempts is None:
+            return 0
+        while attempts and now - attempts[0] >= window:
+            attempts.popleft()
+        if not attempts:
+            del self._failures[key]
+            return 0
+        return len(attempts)
+
+    def retry_after(self, username, ip):
+        """Segundos a esperar si el usuario o la IP superaron el límite, o 0 si puede intentar"""
+        now = time.monotonic()
+        window = _config('LOGIN_WINDOW_SECONDS', DEFAULT_LOGIN_WINDOW)
+        limits = [
+            (('user', username), _config('LOGIN_MAX_PER_USERNAME', DEFAULT_LOGIN_MAX_PER_USERNAME)),
+            (('ip', ip), _config('LOGIN_MAX_PER_IP', DEFAULT_LOGIN_MAX_PER_IP))
+        ]
+        with self._lock:
+            waits = [
+                window - (now - self._failures[key][0])
+                for key, limit in limits
+                if self._recent(key, now, window) >= limit
+            ]
+        return int(max(waits)) + 1 if waits else 0
+
+    def record_failure(self, username, ip):
+        now = time.monotonic()
+        window = _config('LOGIN_WINDOW_SECONDS', DEFAULT_LOGIN_WINDOW)
+        with self._lock:
+            if len(self._failures) >= MAX_TRACKED_KEYS:
+                # Acotar la memoria ante intentos con muchos usuarios distintos
+                for key in list(self._failures):
+                    self._recent(key, now, window)
+            for key in (('user', username), ('ip', ip)):
+                self._failures.setdefault(key, deque()).append(now)
+
+    def reset(self, username):
+        with self._lock:
+            self._failures.pop(('user', username), None)
+
+login_throttle = LoginThrottle()
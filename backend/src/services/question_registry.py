@@ -0,0 +1,64 @@
+import threading
+import time
+from sqlalchemy import event
+from src.models.database import db
+from src.models.user import SurveyTemplate, Question
+from src.services.template_cache import DEFAULT_CHECK_SECONDS, active_template_ids
+
+class QuestionRegistry:
+    """Mapa en memoria de question_key -> id de pregunta para la plantilla activa"""
+
+    def __init__(self, check_interval=DEFAULT_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._template_ids = ()
+        self._checked_at = 0
+        self._loaded = False
+
+    def load(self):
+        """Cargar las claves de la plantilla activa"""
+        template_ids = active_template_ids()
+        rows = db.session.query(Question.question_key, Question.id).join(
+            SurveyTemplate, Question.survey_template_id == SurveyTemplate.id
+        ).filter(
+            SurveyTemplate.is_active.is_(True),
+            Question.question_key.isnot(None)
+        ).order_by(SurveyTemplate.id, Question.order_index).all()
+        
+        ids = {}
+        for key, question_id in rows:
+            # Si hay más de una plantilla activa se respeta la primera, como en /template
+            ids.setdefault(key, question_id)
+        
+        with self._lock:
+            self._ids = ids
+            self._template_ids = template_ids
+            self._checked_at = time.monotonic()
+            self._loaded = True
+        return ids
+
+    def get(self, key):
+        """Obtener el id de la pregunta para una clave, o None si no existe"""
+        if not self._loaded:
+            self.load()
+        elif time.monotonic() - self._checked_at >= self.check_interval:
+            # Otro proceso (por ejemplo provision-template desde la CLI) pudo activar otra plantilla
+            self._checked_at = time.monotonic()
+            if active_template_ids() != self._template_ids:
+                self.load()
+        return self._ids.get(key)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+question_registry = QuestionRegistry()
+
+def _invalidate_question_registry(mapper, connection, target):
+    question_registry.invalidate()
+
+# Recargar en la próxima consulta si cambian preguntas o plantillas
+for _model in (SurveyTemplate, Question):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _invalidate_question_registry)
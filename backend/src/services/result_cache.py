@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response, request
+from src.services.data_version import current_data_version
+
+# Valores por defecto; se ajustan con RESULT_CACHE_BACKEND ('memory', 'file' o 'none'),
+# RESULT_CACHE_SIZE y RESULT_CACHE_DIR
+DEFAULT_BACKEND = 'memory'
+DEFAULT_MAX_ENTRIES = 256
+
+class MemoryBackend:
+    """Backend en proceso: LRU acotado por cantidad de entradas"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class FileBackend:
+    """Backend en un directorio compartido por varios workers: un archivo por entrada, LRU por mtime"""
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                body = f.read()
+            # Marcar el uso para que la expulsión descarte primero lo menos usado
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return body
+
+    def set(self, key, body):
+        # Escritura atómica: otro worker nunca lee un archivo a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Otro worker ya la expulsó
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+class ResultCache:
+    """Cache de payloads JSON de reportes y dashboard, válido mientras no cambie la versión de los datos"""
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        backend = app.config.get('RESULT_CACHE_BACKEND', DEFAULT_BACKEND)
+        max_entries = app.config.get('RESULT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)
+        if backend == 'memory':
+            self.backend = MemoryBackend(max_entries)
+        elif backend == 'file':
+            self.backend = FileBackend(get_result_cache_dir(app), max_entries)
+        elif backend == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f'RESULT_CACHE_BACKEND no válido: {backend}')
+
+    def enabled(self):
+        return self.backend is not None
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, body):
+        self.backend.set(key, body)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+result_cache = ResultCache()
+
+def get_result_cache_dir(app):
+    """Directorio del backend en archivos (RESULT_CACHE_DIR o junto a la base de datos)"""
+    return app.config.get('RESULT_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'database', 'result_cache'
+    )
+
+def result_cache_key(endpoint, args, data_version):
+    """Clave por endpoint, parámetros normalizados (orden y repetidos) y versión de los datos"""
+    params = sorted((name, sorted(values)) for name, values in args.lists())
+    raw = json.dumps([endpoint, params, data_version], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def request_result_key():
+    """Clave (y ETag) de la petición actual; solo consulta la versión de los datos"""
+    return result_cache_key(request.endpoint, request.args, current_data_version())
+
+def not_modified(key):
+    """Respuesta 304 si el cliente ya tiene la versión identificada por key, o None"""
+    if not request.if_none_match.contains_weak(key):
+        return None
+    response = current_app.response_class(status=304)
+    return with_etag(response, key)
+
+def with_etag(response, key):
+    """Agregar el ETag y exigir revalidación para que el navegador envíe If-None-Match"""
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def conditional_get(view):
+    """Responder 304 sin ejecutar el handler si el ETag (versión + parámetros) no cambió"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request_result_key()
+        cached = not_modified(key)
+        if cached is not None:
+            return cached
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            with_etag(response, key)
+        return response
+    return wrapper
+
+def cached_result(view):
+    """Servir la respuesta 200 del handler con ETag y desde el cache
+
+    Un 304 o un acierto cuestan solo la consulta de versión.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # La versión se lee antes de calcular: si los datos cambian mientras tanto, el
+        # resultado queda bajo la versión anterior y no se vuelve a servir
+        key = request_result_key()
+        cached = not_modified(key)
+        if cached is not None:
+            return cached
+        
+        body = result_cache.get(key) if result_cache.enabled() else None
+        if body is not None:
+            return with_etag(current_app.response_class(body, mimetype='application/json'), key)
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            with_etag(response, key)
+            if result_cache.enabled() and response.is_json:
+                result_cache.set(key, response.get_data(as_text=True))
+        return response
+    return wrapper
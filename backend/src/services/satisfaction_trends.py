@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.database import db
+from src.models.user import SurveyResponse, Question, QuestionAnswer, SatisfactionRollup
+from src.services.data_version import bump_data_version
+
+# Puntaje de cada opción de las preguntas Likert (5 = mejor)
+LIKERT_SCORES = {
+    'work_environment': {'Excelente': 5, 'Muy bueno': 4, 'Bueno': 3, 'Regular': 2, 'Malo': 1},
+    'feels_valued': {'Siempre': 5, 'Frecuentemente': 4, 'A veces': 3, 'Raramente': 2, 'Nunca': 1},
+    'peer_communication': {'Excelente': 5, 'Muy buena': 4, 'Buena': 3, 'Regular': 2, 'Mala': 1},
+    'work_schedule': {'Muy adecuados': 5, 'Adecuados': 4, 'Aceptables': 3, 'Inadecuados': 2, 'Muy inadecuados': 1},
+}
+GRANULARITIES = ('day', 'week', 'month')
+DEFAULT_TREND_QUESTION = 'work_environment'
+# Las encuestas sin área se agrupan bajo esta etiqueta (la clave única no admite NULL)
+NO_AREA = 'Sin área'
+
+def bucket_starts(moment):
+    """Inicio del bucket diario, semanal (lunes) y mensual que contiene la fecha"""
+    day = moment.date()
+    return {
+        'day': day,
+        'week': day - timedelta(days=day.weekday()),
+        'month': day.replace(day=1)
+    }
+
+def add_score(deltas, completed_at, area, question_key, answer_text, sign=1):
+    """Sumar (o restar con sign=-1) el puntaje de una respuesta a los buckets de su fecha"""
+    score = LIKERT_SCORES.get(question_key, {}).get(answer_text)
+    if score is None or completed_at is None:
+        return
+    for granularity, bucket_start in bucket_starts(completed_at).items():
+        delta = deltas[(granularity, bucket_start, area or NO_AREA, question_key)]
+        delta[0] += sign * score
+        delta[1] += sign
+
+def apply_rollup_deltas(deltas):
+    """Aplicar los deltas {(granularidad, inicio, área, pregunta): [suma, cantidad]} en la transacción actual"""
+    rows = [
+        {
+            'granularity': granularity,
+            'bucket_start': bucket_start,
+            'area': area,
+            'question_key': question_key,
+            'score_sum': score_sum,
+            'response_count': response_count
+        }
+        for (granularity, bucket_start, area, question_key), (score_sum, response_count) in deltas.items()
+        if score_sum or response_count
+    ]
+    if not rows:
+        return
+    
+    stmt = sqlite_insert(SatisfactionRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['granularity', 'question_key', 'bucket_start', 'area'],
+        set_={
+            'score_sum': SatisfactionRollup.score_sum + stmt.excluded.score_sum,
+            'response_count': SatisfactionRollup.response_count + stmt.excluded.response_count
+        }
+    )
+    db.session.execute(stmt, rows)
+
+def record_completed_response(response, completed_at):
+    """Sumar a los buckets las respuestas Likert de una encuesta que se acaba de completar"""
+    rows = db.session.query(Question.question_key, QuestionAnswer.answer_text).join(
+        Question, Question.id == QuestionAnswer.question_id
+    ).filter(
+        QuestionAnswer.survey_response_id == response.id,
+        Question.question_key.in_(LIKERT_SCORES)
+    ).all()
+    
+    deltas = defaultdict(lambda: [0, 0])
+    for question_key, answer_text in rows:
+        add_score(deltas, completed_at, response.employee_area, question_key, answer_text)
+    apply_rollup_deltas(deltas)
+
+def apply_answer_rollup_changes(response, changes):
+    """Ajustar los buckets cuando cambia una respuesta de una encuesta ya completada
+
+    changes es un iterable de (question_id, valor_anterior, valor_nuevo), como en los agregados.
+    """
+    if response.status != 'completed' or response.completed_at is None:
+        return
+    changes = [change for change in changes if change[1] != change[2]]
+    if not changes:
+        return
+    
+    question_keys = dict(db.session.query(Question.id, Question.question_key).filter(
+        Question.id.in_([question_id for question_id, _, _ in changes]),
+        Question.question_key.in_(LIKERT_SCORES)
+    ).all())
+    
+    deltas = defaultdict(lambda: [0, 0])
+    for question_id, old_value, new_value in changes:
+        question_key = question_keys.get(question_id)
+        if question_key:
+            add_score(deltas, response.completed_at, response.employee_area, question_key, old_value, sign=-1)
+            add_score(deltas, response.completed_at, response.employee_area, question_key, new_value)
+    apply_rollup_deltas(deltas)
+
+def rebuild_satisfaction_rollups(batch_size=1000):
+    """Regenerar los buckets desde el historial en una sola pasada en streaming
+
+    La memoria usada es proporcional a la cantidad de buckets, no de respuestas.
+    """
+    rows = db.session.execute(
+        select(
+            SurveyResponse.completed_at,
+            SurveyResponse.employee_area,
+            Question.question_key,
+            QuestionAnswer.answer_text
+        ).join(
+            QuestionAnswer, QuestionAnswer.survey_response_id == SurveyResponse.id
+        ).join(
+            Question, Question.id == QuestionAnswer.question_id
+        ).where(
+            SurveyResponse.status == 'completed',
+            Question.question_key.in_(LIKERT_SCORES)
+        ).execution_options(yield_per=batch_size)
+    )
+    
+    deltas = defaultdict(lambda: [0, 0])
+    for completed_at, area, question_key, answer_text in rows:
+        add_score(deltas, completed_at, area, question_key, answer_text)
+    
+    db.session.execute(text("DELETE FROM satisfaction_rollups"))
+    apply_rollup_deltas(deltas)
+    bump_data_version()
+    db.session.commit()
+    return len(deltas)
+
+def satisfaction_trend(granularity='month', question_key=DEFAULT_TREND_QUESTION, area=None, date_from=None, date_to=None):
+    """Promedio por bucket de una pregunta Likert, leído solo de los buckets (opcionalmente de un área)"""
+    query = db.session.query(
+        SatisfactionRollup.bucket_start,
+        func.sum(SatisfactionRollup.score_sum),
+        func.sum(SatisfactionRollup.response_count)
+    ).filter(
+        SatisfactionRollup.granularity == granularity,
+        SatisfactionRollup.question_key == question_key
+    )
+    if area:
+        query = query.filter(SatisfactionRollup.area == area)
+    if date_from:
+        query = query.filter(SatisfactionRollup.bucket_start >= date_from)
+    if date_to:
+        query = query.filter(SatisfactionRollup.bucket_start <= date_to)
+    
+    rows = query.group_by(SatisfactionRollup.bucket_start).order_by(SatisfactionRollup.bucket_start).all()
+    return [
+        {'date': bucket_start.isoformat(), 'average': round(score_sum / count, 2), 'count': count}
+        for bucket_start, score_sum, count in rows if count
+    ]
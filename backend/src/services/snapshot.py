@@ -0,0 +1,240 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from src.models.database import db
+from src.models.user import SurveyResponse, QuestionAnswer, Question
+from src.services.data_version import bump_data_version
+
+# Formato del archivo: MAGIC, largo del encabezado (uint64), encabezado JSON y luego
+# columnas int32 contiguas. Cada columna de pregunta guarda códigos de diccionario:
+# 0 = sin respuesta, i = dictionary[i - 1].
+MAGIC = b'PCSNAP1\n'
+HEADER_LENGTH = struct.Struct('<Q')
+CODE_TYPE = 'i'
+CODE_SIZE = array(CODE_TYPE).itemsize
+
+class AnswerSnapshot:
+    """Vista columnar (respuesta x pregunta) de las encuestas completadas, mapeada en memoria"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.mtime = os.path.getmtime(path)
+        
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('Archivo de snapshot inválido')
+        (header_length,) = HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+        data_start = len(MAGIC) + HEADER_LENGTH.size
+        self.header = json.loads(self._mmap[data_start:data_start + header_length])
+        self.rows = self.header['rows']
+        
+        base = data_start + header_length
+        view = memoryview(self._mmap)
+        
+        def column(offset):
+            start = base + offset * CODE_SIZE
+            return view[start:start + self.rows * CODE_SIZE].cast(CODE_TYPE)
+        
+        self.response_ids = column(self.header['response_ids_offset'])
+        self.columns = {}
+        for entry in self.header['questions']:
+            self.columns[entry['question_id']] = (column(entry['offset']), entry['dictionary'])
+
+    def question_ids(self):
+        return list(self.columns)
+
+    def distribution(self, question_id):
+        """Conteo por valor de una pregunta, ordenado por valor"""
+        if question_id not in self.columns:
+            return []
+        codes, dictionary = self.columns[question_id]
+        counts = Counter(codes)
+        return sorted(
+            (dictionary[code - 1], count) for code, count in counts.items() if code
+        )
+
+    def crosstab(self, row_question_id, column_question_id):
+        """Tabla de contingencia entre dos preguntas sobre los códigos, sin consultar la base"""
+        table = {}
+        if row_question_id in self.columns and column_question_id in self.columns:
+            row_codes, row_dictionary = self.columns[row_question_id]
+            column_codes, column_dictionary = self.columns[column_question_id]
+            
+            # Counter sobre pares de códigos enteros: un solo recorrido en C
+            for (row_code, column_code), count in Counter(zip(row_codes, column_codes)).items():
+                if row_code and column_code:
+                    row_value = row_dictionary[row_code - 1]
+                    table.setdefault(row_value, {})[column_dictionary[column_code - 1]] = count
+        
+        row_totals = {row_value: sum(counts.values()) for row_value, counts in table.items()}
+        column_totals = Counter()
+        for counts in table.values():
+            column_totals.update(counts)
+        
+        return {
+            'row_question_id': row_question_id,
+            'column_question_id': column_question_id,
+            'rows': sorted(table),
+            'columns': sorted(column_totals),
+            'table': table,
+            'row_totals': row_totals,
+            'column_totals': dict(column_totals),
+            'total': sum(row_totals.values())
+        }
+
+def answer_value(answer_text, answer_numeric, answer_json):
+    """Unificar las tres columnas de respuesta en un único valor categórico"""
+    if answer_text is not None:
+        return answer_text
+    if answer_numeric is not None:
+        return str(answer_numeric)
+    if answer_json is not None:
+        return json.dumps(answer_json, ensure_ascii=False, sort_keys=True)
+    return None
+
+def build_snapshot(path, previous=None, batch_size=1000):
+    """Construir (o refrescar a partir de previous) el snapshot columnar y guardarlo en path
+
+    El refresco incremental incorpora las encuestas completadas que no están en el snapshot
+    anterior; las ediciones posteriores a la finalización requieren una reconstrucción completa.
+    """
+    question_keys = dict(db.session.query(Question.id, Question.question_key).all())
+    
+    response_ids = array(CODE_TYPE)
+    columns = {}
+    dictionaries = {}
+    lookups = {}
+    included = set()
+    
+    if previous is not None:
+        response_ids.extend(previous.response_ids)
+        included.update(response_ids)
+        for question_id, (codes, dictionary) in previous.columns.items():
+            columns[question_id] = array(CODE_TYPE, codes)
+            dictionaries[question_id] = list(dictionary)
+            lookups[question_id] = {value: index + 1 for index, value in enumerate(dictionary)}
+    
+    query = db.session.query(
+        SurveyResponse.id,
+        QuestionAnswer.question_id,
+        QuestionAnswer.answer_text,
+        QuestionAnswer.answer_numeric,
+        QuestionAnswer.answer_json
+    ).join(
+        QuestionAnswer, QuestionAnswer.survey_response_id == SurveyResponse.id
+    ).filter(SurveyResponse.status == 'completed')
+    
+    if previous is None:
+        batches = [query.order_by(SurveyResponse.id).yield_per(batch_size)]
+    else:
+        # Las encuestas no se completan en orden de id ni de completed_at (se fija antes del commit),
+        # así que no sirve una marca de agua: se comparan los ids completados, leídos solo del índice
+        # (status, id), con los del snapshot y se cargan las respuestas de los que faltan
+        new_ids = [
+            response_id for response_id in db.session.scalars(
+                db.select(SurveyResponse.id).where(SurveyResponse.status == 'completed').order_by(SurveyResponse.id)
+            )
+            if response_id not in included
+        ]
+        batches = [
+            query.filter(SurveyResponse.id.in_(new_ids[start:start + batch_size])).order_by(SurveyResponse.id)
+            for start in range(0, len(new_ids), batch_size)
+        ]
+    
+    row_index = {}
+    for response_id, question_id, answer_text, answer_numeric, answer_json in \
+            (row for batch in batches for row in batch):
+        index = row_index.get(response_id)
+        if index is None:
+            index = row_index[response_id] = len(response_ids)
+            response_ids.append(response_id)
+            for codes in columns.values():
+                codes.append(0)
+        
+        value = answer_value(answer_text, answer_numeric, answer_json)
+        if value is None:
+            continue
+        
+        if question_id not in columns:
+            columns[question_id] = array(CODE_TYPE, bytes(CODE_SIZE * len(response_ids)))
+            dictionaries[question_id] = []
+            lookups[question_id] = {}
+        code = lookups[question_id].get(value)
+        if code is None:
+            dictionaries[question_id].append(value)
+            code = lookups[question_id][value] = len(dictionaries[question_id])
+        columns[question_id][index] = code
+    
+    # Escribir en un archivo temporal y reemplazar de forma atómica
+    header = {
+        'built_at': datetime.utcnow().isoformat(),
+        'rows': len(response_ids),
+        'response_ids_offset': 0,
+        'questions': []
+    }
+    offset = len(response_ids)
+    for question_id in sorted(columns):
+        header['questions'].append({
+            'question_id': question_id,
+            'question_key': question_keys.get(question_id),
+            'offset': offset,
+            'dictionary': dictionaries[question_id]
+        })
+        offset += len(response_ids)
+    
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    tmp_path = f'{path}.tmp'
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        response_ids.tofile(f)
+        for question_id in sorted(columns):
+            columns[question_id].tofile(f)
+    os.replace(tmp_path, path)
+    
+    return AnswerSnapshot(path)
+
+def get_snapshot_path():
+    """Ruta del archivo de snapshot (SNAPSHOT_PATH o junto a la base de datos)"""
+    return current_app.config.get('SNAPSHOT_PATH') or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'database', 'snapshot', 'answers.snap'
+    )
+
+class SnapshotStore:
+    """Snapshot compartido por el proceso; se vuelve a mapear si el archivo cambia"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get(self, path):
+        """Obtener el snapshot mapeado, o None si aún no se ha construido"""
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            if self._snapshot is None or self._snapshot.path != path or \
+                    self._snapshot.mtime != os.path.getmtime(path):
+                self._snapshot = AnswerSnapshot(path)
+            return self._snapshot
+
+    def refresh(self, path, full=False):
+        """Incorporar las encuestas nuevas (o reconstruir todo si full) y publicar el resultado"""
+        previous = None if full else self.get(path)
+        snapshot = build_snapshot(path, previous=previous)
+        with self._lock:
+            self._snapshot = snapshot
+        # Las tablas cruzadas servidas desde el snapshot cambian aunque no cambien las respuestas
+        bump_data_version()
+        db.session.commit()
+        return snapshot
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,74 @@
+import hashlib
+import threading
+import time
+from sqlalchemy import event
+from src.models.database import db
+from src.models.user import SurveyTemplate, Question
+
+# Tiempo máximo que un proceso reutiliza la plantilla serializada
+DEFAULT_TTL_SECONDS = 300
+# Segundos entre comprobaciones de la plantilla activa (los eventos solo cubren este proceso)
+DEFAULT_CHECK_SECONDS = 5
+
+def active_template_ids():
+    """Ids de las plantillas activas; cambian cada vez que se aprovisiona o reactiva una versión"""
+    return tuple(db.session.scalars(
+        db.select(SurveyTemplate.id).where(SurveyTemplate.is_active.is_(True)).order_by(SurveyTemplate.id)
+    ))
+
+class TemplateCache:
+    """Cache en proceso de la plantilla activa serializada, por id y versión de plantilla"""
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, check_interval=DEFAULT_CHECK_SECONDS):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._active_key = None
+        self._checked_at = 0
+
+    def get_active(self):
+        """Obtener la entrada de la plantilla activa si sigue vigente"""
+        with self._lock:
+            entry = self._entries.get(self._active_key)
+            if not entry or time.monotonic() - entry['stored_at'] >= self.ttl:
+                return None
+            check = time.monotonic() - self._checked_at >= self.check_interval
+            if check:
+                self._checked_at = time.monotonic()
+        
+        # Otro proceso (por ejemplo provision-template desde la CLI) pudo activar otra plantilla
+        if check and entry['template_id'] not in active_template_ids():
+            self.invalidate()
+            return None
+        return entry
+
+    def store(self, template_id, version, body):
+        """Guardar el payload serializado y calcular su ETag fuerte"""
+        entry = {
+            'template_id': template_id,
+            'version': version,
+            'body': body,
+            'etag': hashlib.sha256(body.encode('utf-8')).hexdigest(),
+            'stored_at': time.monotonic()
+        }
+        with self._lock:
+            self._entries[(template_id, version)] = entry
+            self._active_key = (template_id, version)
+            self._checked_at = time.monotonic()
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._active_key = None
+
+template_cache = TemplateCache()
+
+def _invalidate_template_cache(mapper, connection, target):
+    template_cache.invalidate()
+
+# Cualquier cambio en preguntas o plantillas invalida el cache
+for _model in (SurveyTemplate, Question):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _invalidate_template_cache)
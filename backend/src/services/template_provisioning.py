@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from flask import current_app
+from sqlalchemy import insert
+from src.models.database import db
+from src.models.user import User, SurveyTemplate, Question
+from src.services.template_cache import template_cache
+from src.services.question_registry import question_registry
+from src.services.data_version import bump_data_version
+
+# Serializa el aprovisionamiento dentro del proceso; entre procesos lo hace BEGIN IMMEDIATE
+_provision_lock = threading.Lock()
+
+def get_template_file():
+    """Ruta del archivo declarativo de la plantilla (SURVEY_TEMPLATE_FILE o la incluida)"""
+    return current_app.config.get('SURVEY_TEMPLATE_FILE') or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'database', 'seeds', 'survey_template.json'
+    )
+
+def load_template_file(path):
+    """Leer y validar la definición de plantilla en JSON"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    
+    for field in ('title', 'version', 'questions'):
+        if not data.get(field):
+            raise ValueError(f"La plantilla no define '{field}'")
+    keys = [q.get('key') for q in data['questions']]
+    if len(set(keys)) != len(keys):
+        raise ValueError('Las claves de pregunta deben ser únicas')
+    return data
+
+def provision_template(path=None, seed=False):
+    """Activar la plantilla del archivo, creándola solo si no existe ya con el mismo título y versión
+
+    Una versión activada desactiva las demás. Con seed=True (init-db) solo se actúa si no hay
+    ninguna plantilla activa, para no reemplazar una versión publicada después.
+    Retorna (plantilla, creada).
+    """
+    data = load_template_file(path or get_template_file())
+    
+    with _provision_lock:
+        # Tomar el lock de escritura antes de leer para que dos procesos no creen la misma versión
+        db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+        try:
+            if seed:
+                active = SurveyTemplate.query.filter_by(is_active=True).order_by(SurveyTemplate.id).first()
+                if active:
+                    db.session.rollback()
+                    return active, False
+            
+            existing = SurveyTemplate.query.filter_by(
+                title=data['title'], version=data['version']
+            ).order_by(SurveyTemplate.is_active.desc(), SurveyTemplate.id.desc()).first()
+            if existing and existing.is_active:
+                db.session.rollback()
+                return existing, False
+            
+            SurveyTemplate.query.filter_by(is_active=True).update({'is_active': False})
+            
+            if existing:
+                # La versión ya se cargó antes: reactivarla en lugar de duplicar sus preguntas
+                existing.is_active = True
+                bump_data_version()
+                db.session.commit()
+                template, created = existing, False
+            else:
+                template, created = create_template(data), True
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    # El insert masivo y el update por consulta no disparan los eventos del ORM
+    template_cache.invalidate()
+    question_registry.invalidate()
+    return template, created
+
+def create_template(data):
+    """Insertar la plantilla y sus preguntas y confirmar la transacción en curso"""
+    admin = User.query.filter_by(role='admin').order_by(User.id).first()
+    template = SurveyTemplate(
+        title=data['title'],
+        description=data.get('description'),
+        version=data['version'],
+        created_by=admin.id if admin else None
+    )
+    db.session.add(template)
+    db.session.flush()  # Para obtener el ID
+    
+    # Inserción masiva de todas las preguntas en una sola sentencia
+    db.session.execute(insert(Question), [
+        {
+            'survey_template_id': template.id,
+            'question_key': q['key'],
+            'section_name': q['section'],
+            'question_text': q['text'],
+            'question_type': q['type'],
+            'options': q.get('options'),
+            'is_required': q.get('required', False),
+            'order_index': q['order'],
+            'validation_rules': q.get('validation_rules')
+        }
+        for q in data['questions']
+    ])
+    # Los reportes en cache dependen de la plantilla activa
+    bump_data_version()
+    db.session.commit()
+    return template
@@ -0,0 +1,65 @@
+import threading
+import time
+from flask import current_app, jsonify
+from sqlalchemy import event
+from src.models.database import db
+from src.models.user import User
+
+# Segundos que un proceso reutiliza los datos de un usuario autenticado; se ajusta con USER_CACHE_TTL
+DEFAULT_TTL_SECONDS = 60
+
+class UserCache:
+    """Cache en proceso de usuarios autenticados por id, con TTL e invalidación por eventos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, user_id):
+        """Obtener el usuario serializado (to_dict) o None si no existe; a lo sumo una consulta por TTL"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        
+        ttl = current_app.config.get('USER_CACHE_TTL', DEFAULT_TTL_SECONDS)
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        
+        user = db.session.get(User, user_id)
+        # También se guarda la ausencia para no consultar en cada petición con un token huérfano
+        data = user.to_dict() if user else None
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), data)
+        return data
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+user_cache = UserCache()
+
+def register_user_loader(jwt):
+    """Resolver current_user desde el cache; un usuario inactivo o eliminado invalida el token"""
+    @jwt.user_lookup_loader
+    def load_user(_jwt_header, jwt_data):
+        user = user_cache.get(jwt_data[current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')])
+        if user and user['is_active']:
+            return user
+        return None
+    
+    @jwt.user_lookup_error_loader
+    def user_lookup_error(_jwt_header, jwt_data):
+        return jsonify({'error': 'Usuario no válido'}), 401
+
+def _invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+# Desactivaciones y cambios de rol se ven en la siguiente petición del mismo proceso
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(User, _event_name, _invalidate_user)
@@ -0,0 +1,57 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app, init_db
+
+def make_app(tmp_path, **config):
+    """Aplicación sobre una base SQLite en archivo, con esquema, administrador y plantilla"""
+    app = create_app({
+        'TESTING': True,
+        'JWT_SECRET_KEY': 'clave-de-pruebas-suficientemente-larga',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'EXPORT_DIR': str(tmp_path / 'exports'),
+        'RESULT_CACHE_BACKEND': 'none',
+        'PASSWORD_BCRYPT_ROUNDS': 4,
+        **config,
+    })
+    with app.app_context():
+        init_db()
+    return app
+
+def dispose_app(app):
+    with app.app_context():
+        from src.models.database import db
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    dispose_app(app)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(app):
+    from flask_jwt_extended import create_access_token
+    from src.models.user import User
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        token = create_access_token(identity=str(admin.id))
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def questions(client):
+    """Preguntas de la plantilla activa por question_key"""
+    template = client.get('/api/survey/template').get_json()
+    return {q['question_key']: q for section in template['sections'] for q in section['questions']}
+
+def start_response(client, area='Mecánica', name='Empleado'):
+    return client.post('/api/survey/start', json={'employee_name': name, 'employee_area': area}).get_json()['response_id']
@@ -0,0 +1,47 @@
+import threading
+from sqlalchemy import text
+from src.models.database import db
+from conftest import start_response
+
+SATISFACTION_VALUES = ['Excelente', 'Muy bueno', 'Bueno', 'Regular', 'Malo']
+
+def recount(app):
+    """Conteo real por valor desde question_answers, y lo que dicen los agregados"""
+    with app.app_context():
+        actual = dict(db.session.execute(text("""
+            SELECT question_id || ':' || answer_text, COUNT(*) FROM question_answers
+            WHERE answer_text IS NOT NULL GROUP BY question_id, answer_text
+        """)).all())
+        aggregated = dict(db.session.execute(text("""
+            SELECT question_id || ':' || answer_value, SUM(total_count) FROM answer_aggregates
+            GROUP BY question_id, answer_value HAVING SUM(total_count) != 0
+        """)).all())
+    return actual, aggregated
+
+def test_concurrent_saves_keep_aggregates_exact(app, questions):
+    client = app.test_client()
+    question_id = questions['work_environment']['id']
+    response_ids = [start_response(client, name=f'E{i}') for i in range(6)]
+    errors = []
+    
+    def worker(offset):
+        worker_client = app.test_client()
+        for i in range(30):
+            # Todos los hilos reescriben las mismas (encuesta, pregunta)
+            response_id = response_ids[i % len(response_ids)]
+            value = SATISFACTION_VALUES[(i + offset) % len(SATISFACTION_VALUES)]
+            r = worker_client.post('/api/survey/answer', json={
+                'response_id': response_id, 'question_id': question_id, 'answer': value
+            })
+            if r.status_code != 200:
+                errors.append(r.get_json())
+    
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    actual, aggregated = recount(app)
+    assert aggregated == actual
@@ -0,0 +1,58 @@
+import fcntl
+import pytest
+from src.main import create_app
+from src.models.database import db
+from src.models.user import QuestionAnswer
+from src.services.answer_buffer import answer_buffer
+from conftest import make_app, dispose_app, start_response
+
+def write_behind_app(tmp_path):
+    return create_app({
+        'TESTING': True,
+        'JWT_SECRET_KEY': 'clave-de-pruebas-suficientemente-larga',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'ANSWER_WRITE_BEHIND': True,
+    })
+
+def test_write_behind_refuses_a_second_process(tmp_path):
+    """Otro proceso con el buffer sobre la misma base impide arrancar con ANSWER_WRITE_BEHIND"""
+    with open(tmp_path / 'test.db.write-behind.lock', 'w') as other_process:
+        fcntl.flock(other_process, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with pytest.raises(RuntimeError, match='un solo proceso'):
+            write_behind_app(tmp_path)
+
+def test_write_behind_holds_the_process_lock(tmp_path):
+    app = write_behind_app(tmp_path)
+    with app.app_context():
+        assert answer_buffer.enabled()
+    
+    with open(tmp_path / 'test.db.write-behind.lock', 'w') as other_process:
+        with pytest.raises(OSError):
+            fcntl.flock(other_process, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+def test_batch_save_is_not_overwritten_by_older_buffered_answer(tmp_path):
+    """Una respuesta en el buffer no pisa la que llega después por /answers"""
+    # Intervalo largo: la respuesta queda en el buffer hasta que algo lo vacíe
+    app = make_app(tmp_path, ANSWER_WRITE_BEHIND=True, ANSWER_FLUSH_INTERVAL_MS=60000, ANSWER_FLUSH_BATCH=1000)
+    try:
+        client = app.test_client()
+        question_id = client.get('/api/survey/template').get_json()['sections'][0]['questions'][0]['id']
+        response_id = start_response(client)
+        
+        buffered = client.post('/api/survey/answer', json={
+            'response_id': response_id, 'question_id': question_id, 'answer': 'Malo'
+        })
+        assert buffered.get_json()['buffered']
+        client.post('/api/survey/answers', json={
+            'response_id': response_id, 'answers': [{'question_id': question_id, 'answer': 'Excelente'}]
+        })
+        
+        with app.app_context():
+            answer_buffer.flush()
+            stored = db.session.query(QuestionAnswer.answer_text).filter_by(
+                survey_response_id=response_id, question_id=question_id
+            ).scalar()
+        assert stored == 'Excelente'
+    finally:
+        answer_buffer.shutdown()
+        dispose_app(app)
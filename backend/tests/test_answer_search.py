@@ -0,0 +1,16 @@
+from conftest import start_response
+
+def test_snippet_escapes_answer_markup(client, auth_headers, questions):
+    response_id = start_response(client)
+    client.post('/api/survey/answer', json={
+        'response_id': response_id,
+        'question_id': questions['daily_duties']['id'],
+        'answer': '<img src=x onerror=alert(1)> faltan herramientas & repuestos'
+    })
+    
+    result = client.get('/api/reports/search?q=herramientas', headers=auth_headers).get_json()
+    
+    assert result['total'] == 1
+    assert result['results'][0]['snippet'] == (
+        '&lt;img src=x onerror=alert(1)&gt; faltan <mark>herramientas</mark> &amp; repuestos'
+    )
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import event
+from src.models.database import db
+
+CONDITIONAL_ENDPOINTS = [
+    '/api/dashboard/stats',
+    '/api/dashboard/satisfaction',
+    '/api/dashboard/hierarchy',
+    '/api/dashboard/issues',
+    '/api/dashboard/overview',
+    '/api/reports/summary',
+]
+
+@pytest.fixture
+def statements(app):
+    """Sentencias SQL ejecutadas en cualquiera de los engines mientras la lista está activa"""
+    executed = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield executed
+    for engine in engines:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.mark.parametrize('path', CONDITIONAL_ENDPOINTS)
+def test_matching_etag_only_reads_data_version(client, auth_headers, statements, path):
+    """Con If-None-Match vigente el 304 cuesta solo la consulta de la versión de los datos"""
+    first = client.get(path, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    
+    statements.clear()
+    second = client.get(path, headers={**auth_headers, 'If-None-Match': etag})
+    
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    assert len(statements) == 1
+    assert 'data_versions' in statements[0]
+
+def test_changed_data_invalidates_etag(client, auth_headers):
+    etag = client.get('/api/dashboard/stats', headers=auth_headers).headers['ETag']
+    client.post('/api/survey/start', json={'employee_name': 'Nuevo', 'employee_area': 'Mecánica'})
+    
+    response = client.get('/api/dashboard/stats', headers={**auth_headers, 'If-None-Match': etag})
+    
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,25 @@
+from src.routes.dashboard import load_answers_by_response
+from conftest import start_response
+
+def answer(client, response_id, question, value):
+    r = client.post('/api/survey/answer', json={
+        'response_id': response_id, 'question_id': question['id'], 'answer': value
+    })
+    assert r.status_code == 200
+
+def test_hierarchy_only_loads_completed_responses(app, client, auth_headers, questions):
+    completed = start_response(client, name='Ana')
+    in_progress = start_response(client, name='Luis')
+    for response_id in (completed, in_progress):
+        answer(client, response_id, questions['role'], 'Técnico')
+        answer(client, response_id, questions['supervisor'], 'Marta')
+    client.post('/api/survey/complete', json={'response_id': completed})
+    
+    with app.app_context():
+        loaded = load_answers_by_response([questions['role']['id']], status='completed')
+        everything = load_answers_by_response([questions['role']['id']])
+    assert list(loaded) == [completed]
+    assert list(everything) == [completed, in_progress]
+    
+    chart = client.get('/api/dashboard/hierarchy', headers=auth_headers).get_json()['organizational_chart']
+    assert [report['name'] for report in chart[0]['direct_reports']] == ['Ana']
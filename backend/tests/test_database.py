@@ -0,0 +1,59 @@
+import threading
+from sqlalchemy import text
+from src.models.database import db
+from conftest import start_response
+
+WRITERS = 4
+READERS = 3
+SURVEYS_PER_WRITER = 10
+
+def test_concurrent_writers_and_readers_on_file_database(app, questions, auth_headers):
+    """Escritores y lectores simultáneos sobre la base en archivo: sin 'database is locked' y conteos exactos"""
+    question_id = questions['work_environment']['id']
+    errors = []
+    writers_done = threading.Event()
+    
+    def writer(index):
+        client = app.test_client()
+        for i in range(SURVEYS_PER_WRITER):
+            response_id = start_response(client, name=f'W{index}-{i}')
+            for path, payload in (
+                ('/api/survey/answer', {'response_id': response_id, 'question_id': question_id, 'answer': 'Bueno'}),
+                ('/api/survey/complete', {'response_id': response_id}),
+            ):
+                r = client.post(path, json=payload)
+                if r.status_code != 200:
+                    errors.append((path, r.status_code, r.get_json()))
+    
+    def reader():
+        client = app.test_client()
+        while not writers_done.is_set():
+            for path in ('/api/dashboard/stats', '/api/reports/responses?page_size=50'):
+                r = client.get(path, headers=auth_headers)
+                if r.status_code != 200:
+                    errors.append((path, r.status_code, r.get_json()))
+    
+    readers = [threading.Thread(target=reader) for _ in range(READERS)]
+    writers = [threading.Thread(target=writer, args=(index,)) for index in range(WRITERS)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writers_done.set()
+    for thread in readers:
+        thread.join()
+    
+    assert not [error for error in errors if 'locked' in str(error)]
+    assert errors == []
+    
+    expected = WRITERS * SURVEYS_PER_WRITER
+    with app.app_context():
+        counts = db.session.execute(text("""
+            SELECT
+                (SELECT COUNT(*) FROM survey_responses),
+                (SELECT COUNT(*) FROM survey_responses WHERE status = 'completed'),
+                (SELECT COUNT(*) FROM question_answers WHERE question_id = :question_id),
+                (SELECT SUM(total_count) FROM response_aggregates),
+                (SELECT SUM(completed_count) FROM response_aggregates)
+        """), {'question_id': question_id}).one()
+    assert tuple(counts) == (expected,) * 5
@@ -0,0 +1,42 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from src.main import init_db
+from src.models.database import db
+from src.models.user import ExportJob
+from src.services.data_version import current_data_version
+
+def stuck_job(job_id, params_hash, status, age):
+    return ExportJob(
+        id=job_id, job_type='summary', params={}, params_hash=params_hash, data_version=0,
+        status=status, created_at=datetime.utcnow() - age
+    )
+
+def test_stale_job_is_not_returned_by_dedup(app, client, auth_headers):
+    with app.app_context():
+        params_hash = hashlib.sha256(
+            json.dumps({'job_type': 'summary', 'params': {}}, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        # Simula un worker que murió con el trabajo en curso hace dos horas
+        job = stuck_job('stuck', params_hash, 'running', timedelta(hours=2))
+        job.data_version = current_data_version()
+        db.session.add(job)
+        db.session.commit()
+    
+    response = client.post('/api/reports/jobs', json={'job_type': 'summary'}, headers=auth_headers)
+    
+    assert response.status_code == 202
+    assert response.get_json()['job_id'] != 'stuck'
+    assert client.get('/api/reports/jobs/stuck', headers=auth_headers).get_json()['status'] == 'failed'
+
+def test_init_db_fails_interrupted_jobs(app):
+    with app.app_context():
+        db.session.add_all([
+            stuck_job('queued', 'a', 'queued', timedelta(0)),
+            stuck_job('running', 'b', 'running', timedelta(0)),
+        ])
+        db.session.commit()
+        
+        init_db()
+        
+        assert {job.status for job in ExportJob.query.all()} == {'failed'}
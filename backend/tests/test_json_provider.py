@@ -0,0 +1,15 @@
+import logging
+from src.main import create_app
+from src.services.json_provider import OrjsonProvider, StdlibJSONProvider
+
+def make_app(provider):
+    return create_app({'TESTING': True, 'JWT_SECRET_KEY': 'clave-de-pruebas-suficientemente-larga', 'JSON_PROVIDER': provider})
+
+def test_chosen_provider_is_logged(caplog):
+    with caplog.at_level(logging.INFO, logger='src.services.json_provider'):
+        app = make_app('auto')
+    assert isinstance(app.json, OrjsonProvider)
+    assert 'Proveedor JSON: orjson' in caplog.text
+
+def test_stdlib_can_be_forced():
+    assert isinstance(make_app('stdlib').json, StdlibJSONProvider)
@@ -0,0 +1,83 @@
+from src.services.org_graph import build_org_graph, normalize_name
+
+def test_tree_levels_and_span():
+    graph = build_org_graph([
+        ('Ana', 'Ventas', None),
+        ('Luis', 'Ventas', 'Ana'),
+        ('Marta', 'Ventas', 'Ana'),
+        ('Pedro', 'Taller', 'Luis'),
+    ])
+    
+    assert graph['management_levels'] == 2
+    assert graph['span_of_control'] == {'supervisors': 2, 'min': 1, 'max': 2, 'average': 1.5, 'median': 1.5}
+    assert graph['cycles'] == []
+    assert graph['orphaned_nodes'] == []
+    assert graph['areas_without_clear_hierarchy'] == []
+
+def test_names_are_merged_ignoring_accents_case_and_spaces():
+    assert normalize_name('  José   PÉREZ ') == 'jose perez'
+    
+    graph = build_org_graph([
+        ('José Pérez', 'Ventas', None),
+        ('Ana', 'Ventas', 'jose  PEREZ'),
+        ('Luis', 'Taller', 'Jose Perez'),
+    ])
+    
+    # Un solo supervisor con dos reportes, no tres nodos distintos
+    assert graph['span_of_control']['supervisors'] == 1
+    assert graph['span_of_control']['max'] == 2
+    assert graph['management_levels'] == 1
+    assert graph['orphaned_nodes'] == []
+
+def test_supervisor_outside_the_respondents_is_a_root():
+    graph = build_org_graph([('Luis', 'Taller', 'Gerente'), ('Ana', 'Taller', 'Luis')])
+    
+    assert graph['management_levels'] == 2
+    assert graph['orphaned_nodes'] == []
+
+def test_self_reported_supervisor_is_an_orphan():
+    graph = build_org_graph([('Ana', 'Ventas', 'ana'), ('Luis', 'Taller', None)])
+    
+    assert graph['management_levels'] == 0
+    assert graph['span_of_control']['supervisors'] == 0
+    assert graph['cycles'] == []
+    assert sorted(graph['orphaned_nodes']) == ['Ana', 'Luis']
+    assert sorted(graph['areas_without_clear_hierarchy']) == ['Taller', 'Ventas']
+
+def test_cycle_with_a_node_hanging_off_it():
+    graph = build_org_graph([
+        ('A', 'Norte', 'B'),
+        ('B', 'Norte', 'C'),
+        ('C', 'Norte', 'A'),
+        ('D', 'Sur', 'A'),
+    ])
+    
+    # D cuelga del ciclo pero no es parte de él
+    assert [sorted(cycle) for cycle in graph['cycles']] == [['A', 'B', 'C']]
+    assert graph['management_levels'] == 3
+    assert graph['orphaned_nodes'] == []
+    assert graph['areas_without_clear_hierarchy'] == ['Norte']
+    assert graph['span_of_control'] == {'supervisors': 3, 'min': 1, 'max': 2, 'average': 1.33, 'median': 1}
+
+def test_cycle_next_to_a_tree():
+    graph = build_org_graph([
+        ('Jefa', 'Ventas', None),
+        ('Ana', 'Ventas', 'Jefa'),
+        ('X', 'Taller', 'Y'),
+        ('Y', 'Taller', 'X'),
+    ])
+    
+    assert [sorted(cycle) for cycle in graph['cycles']] == [['X', 'Y']]
+    assert graph['management_levels'] == 2
+    assert graph['areas_without_clear_hierarchy'] == ['Taller']
+
+def test_empty_rows_and_blank_names():
+    graph = build_org_graph([('', 'Ventas', 'Ana'), (None, None, None)])
+    
+    assert graph == {
+        'management_levels': 0,
+        'span_of_control': {'supervisors': 0, 'min': 0, 'max': 0, 'average': 0, 'median': 0},
+        'cycles': [],
+        'orphaned_nodes': [],
+        'areas_without_clear_hierarchy': []
+    }
@@ -0,0 +1,31 @@
+import sqlite3
+from src.models.database import db
+from src.services.question_registry import question_registry
+
+def test_registry_follows_template_activated_by_another_process(app, monkeypatch):
+    """Una plantilla activada desde otra conexión (sin eventos del ORM) se detecta al consultar"""
+    monkeypatch.setattr(question_registry, 'check_interval', 0)
+    with app.app_context():
+        old_id = question_registry.get('work_environment')
+        assert old_id is not None
+        
+        # Simula provision-template en otro proceso: SQL directo, sin pasar por la sesión
+        path = db.engine.url.database
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE survey_templates SET is_active = 0")
+            template_id = conn.execute(
+                "INSERT INTO survey_templates (title, version, is_active) VALUES ('Nueva', '2.0', 1)"
+            ).lastrowid
+            new_id = conn.execute(
+                "INSERT INTO questions (survey_template_id, question_key, section_name, question_text, "
+                "question_type, is_required, order_index) "
+                "VALUES (?, 'work_environment', 'Clima', 'Ambiente', 'radio', 0, 1)",
+                (template_id,)
+            ).lastrowid
+        conn.close()
+        
+        try:
+            assert question_registry.get('work_environment') == new_id != old_id
+        finally:
+            # El registro es global: no dejar ids de esta base para las demás pruebas
+            question_registry.invalidate()
@@ -0,0 +1,22 @@
+import pytest
+
+@pytest.mark.parametrize('query, message', [
+    ('date_from=ayer', 'date_from'),
+    ('date_to=2025-13-40', 'date_to'),
+    ('format=pdf', 'Formato no soportado'),
+])
+def test_summary_rejects_invalid_parameters(client, auth_headers, query, message):
+    response = client.get(f'/api/reports/summary?{query}', headers=auth_headers)
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+
+def test_summary_accepts_date_range(client, auth_headers):
+    response = client.get('/api/reports/summary?date_from=2025-01-01&date_to=2025-12-31', headers=auth_headers)
+    assert response.status_code == 200
+    assert 'report_data' in response.get_json()
+
+def test_summary_job_rejects_invalid_dates(client, auth_headers):
+    response = client.post('/api/reports/jobs', json={
+        'job_type': 'summary', 'params': {'date_from': 'ayer'}
+    }, headers=auth_headers)
+    assert response.status_code == 400
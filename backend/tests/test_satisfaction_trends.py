@@ -0,0 +1,60 @@
+import threading
+from sqlalchemy import text
+from src.models.database import db
+from src.models.user import SurveyResponse
+from src.services.satisfaction_trends import rebuild_satisfaction_rollups
+from conftest import start_response
+
+SATISFACTION_VALUES = ['Excelente', 'Muy bueno', 'Bueno', 'Regular', 'Malo']
+
+def rollup_rows(app):
+    with app.app_context():
+        return db.session.execute(text("""
+            SELECT granularity, bucket_start, area, question_key, score_sum, response_count
+            FROM satisfaction_rollups WHERE response_count != 0 ORDER BY 1, 2, 3, 4
+        """)).all()
+
+def test_concurrent_edits_of_completed_responses_match_rebuild(app, questions):
+    client = app.test_client()
+    question_id = questions['work_environment']['id']
+    response_ids = []
+    for i in range(5):
+        response_id = start_response(client, area=['Ventas', 'Mecánica'][i % 2], name=f'E{i}')
+        client.post('/api/survey/answer', json={'response_id': response_id, 'question_id': question_id, 'answer': 'Bueno'})
+        client.post('/api/survey/complete', json={'response_id': response_id})
+        response_ids.append(response_id)
+    
+    def worker(offset):
+        worker_client = app.test_client()
+        for i in range(25):
+            worker_client.post('/api/survey/answer', json={
+                'response_id': response_ids[i % len(response_ids)],
+                'question_id': question_id,
+                'answer': SATISFACTION_VALUES[(i + offset) % len(SATISFACTION_VALUES)]
+            })
+    
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    incremental = rollup_rows(app)
+    with app.app_context():
+        rebuild_satisfaction_rollups()
+    assert incremental == rollup_rows(app)
+
+def test_completing_again_keeps_completed_at(app, questions):
+    client = app.test_client()
+    response_id = start_response(client)
+    client.post('/api/survey/answer', json={
+        'response_id': response_id, 'question_id': questions['work_environment']['id'], 'answer': 'Excelente'
+    })
+    assert client.post('/api/survey/complete', json={'response_id': response_id}).status_code == 200
+    with app.app_context():
+        first = db.session.get(SurveyResponse, response_id).completed_at
+    
+    assert client.post('/api/survey/complete', json={'response_id': response_id}).status_code == 200
+    with app.app_context():
+        assert db.session.get(SurveyResponse, response_id).completed_at == first
+    assert len([row for row in rollup_rows(app) if row.granularity == 'day']) == 1
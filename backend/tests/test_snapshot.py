@@ -0,0 +1,81 @@
+from sqlalchemy import text
+from src.models.database import db
+from src.services.crosstab import crosstab
+from src.services.snapshot import AnswerSnapshot, build_snapshot
+from conftest import start_response
+
+TABLE_FIELDS = ('rows', 'columns', 'table', 'row_totals', 'column_totals', 'total')
+
+def answer_all(client, response_id, answers):
+    for question, value in answers:
+        r = client.post('/api/survey/answer', json={
+            'response_id': response_id, 'question_id': question['id'], 'answer': value
+        })
+        assert r.status_code == 200
+
+def complete(client, response_id):
+    assert client.post('/api/survey/complete', json={'response_id': response_id}).status_code == 200
+
+def assert_matches_database(snapshot, row_question_id, column_question_id):
+    expected = crosstab(row_question_id, column_question_id, completed_only=True)
+    actual = snapshot.crosstab(row_question_id, column_question_id)
+    assert {field: actual[field] for field in TABLE_FIELDS} == {field: expected[field] for field in TABLE_FIELDS}
+
+def test_round_trip_matches_database_crosstab(app, client, questions, tmp_path):
+    area, environment = questions['area'], questions['work_environment']
+    for name, values in (('A', ('Ventas', 'Bueno')), ('B', ('Ventas', 'Malo')), ('C', ('Mecánica', 'Bueno'))):
+        response_id = start_response(client, name=name)
+        answer_all(client, response_id, [(area, values[0]), (environment, values[1])])
+        complete(client, response_id)
+    # En curso: no entra al snapshot
+    answer_all(client, start_response(client, name='D'), [(area, 'Ventas'), (environment, 'Excelente')])
+    
+    path = str(tmp_path / 'answers.snap')
+    with app.app_context():
+        built = build_snapshot(path)
+        reopened = AnswerSnapshot(path)
+        
+        assert reopened.rows == built.rows == 3
+        assert list(reopened.response_ids) == list(built.response_ids)
+        assert reopened.distribution(environment['id']) == [('Bueno', 2), ('Malo', 1)]
+        assert_matches_database(reopened, area['id'], environment['id'])
+
+def test_incremental_refresh_adds_late_completions_and_new_columns(app, client, questions, tmp_path):
+    area, environment, tenure = questions['area'], questions['work_environment'], questions['tenure']
+    early = start_response(client, name='Temprano')
+    answer_all(client, early, [(area, 'Ventas'), (environment, 'Bueno')])
+    later = start_response(client, name='Tarde')
+    answer_all(client, later, [(area, 'Mecánica'), (environment, 'Regular')])
+    complete(client, later)
+    
+    path = str(tmp_path / 'answers.snap')
+    with app.app_context():
+        first = build_snapshot(path)
+        assert list(first.response_ids) == [later]
+        assert tenure['id'] not in first.columns
+    
+    # La encuesta con id menor se completa después del primer snapshot, y además responde una
+    # pregunta que el snapshot anterior no tenía como columna
+    answer_all(client, early, [(tenure, '1-3 años')])
+    complete(client, early)
+    with app.app_context():
+        # completed_at se fija antes de tomar el lock: puede quedar anterior a la última completada
+        db.session.execute(text(
+            "UPDATE survey_responses SET completed_at = datetime('now', '-1 day') WHERE id = :id"
+        ), {'id': early})
+        db.session.commit()
+    newest = start_response(client, name='Nuevo')
+    answer_all(client, newest, [(area, 'Ventas'), (environment, 'Excelente'), (tenure, 'Más de 5 años')])
+    complete(client, newest)
+    
+    with app.app_context():
+        refreshed = build_snapshot(path, previous=first)
+        
+        assert list(refreshed.response_ids) == [later, early, newest]
+        tenure_codes, tenure_dictionary = refreshed.columns[tenure['id']]
+        assert [tenure_dictionary[code - 1] if code else None for code in tenure_codes] == [None, '1-3 años', 'Más de 5 años']
+        for row_question, column_question in ((area, environment), (area, tenure), (tenure, environment)):
+            assert_matches_database(refreshed, row_question['id'], column_question['id'])
+        
+        # Refrescar sin cambios no duplica filas
+        assert build_snapshot(path, previous=refreshed).rows == 3
@@ -0,0 +1,58 @@
+from sqlalchemy import text
+from src.models.database import db
+from src.services.data_version import current_data_version
+from conftest import start_response
+
+def stored_answers(app, response_id):
+    with app.app_context():
+        return dict(db.session.execute(text(
+            "SELECT question_id, answer_text FROM question_answers WHERE survey_response_id = :id"
+        ), {'id': response_id}).all())
+
+def data_version(app):
+    with app.app_context():
+        return current_data_version()
+
+def test_batch_reports_each_item(app, client, questions):
+    response_id = start_response(client)
+    environment, valued = questions['work_environment']['id'], questions['feels_valued']['id']
+    
+    response = client.post('/api/survey/answers', json={
+        'response_id': response_id,
+        'answers': [
+            {'question_id': environment, 'answer': 'Bueno'},
+            {'question_id': 999999, 'answer': 'x'},
+            {'question_id': valued, 'answer': 'Nunca'},
+            {'question_id': environment, 'answer': 'Excelente'},
+            {'question_id': [environment], 'answer': 'x'},
+            {'question_id': {'id': 1}, 'answer': 'x'},
+            {'question_id': str(valued), 'answer': 'x'},
+            {'question_id': True, 'answer': 'x'},
+            'no es un objeto',
+        ]
+    })
+    
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success'] is False
+    assert body['saved'] == 3
+    assert [result['success'] for result in body['results']] == [True, False, True, True, False, False, False, False, False]
+    assert {result.get('error') for result in body['results'] if not result['success']} == {'Pregunta no encontrada'}
+    # La repetida conserva la última respuesta
+    assert stored_answers(app, response_id) == {environment: 'Excelente', valued: 'Nunca'}
+
+def test_batch_without_valid_items_does_not_write(app, client, questions):
+    response_id = start_response(client)
+    version = data_version(app)
+    
+    for answers in ([], [{'question_id': [1], 'answer': 'x'}]):
+        response = client.post('/api/survey/answers', json={'response_id': response_id, 'answers': answers})
+        assert response.status_code == 200
+    
+    assert data_version(app) == version
+    assert stored_answers(app, response_id) == {}
+
+def test_batch_requires_a_list(client):
+    response_id = start_response(client)
+    response = client.post('/api/survey/answers', json={'response_id': response_id, 'answers': {'1': 'x'}})
+    assert response.status_code == 400
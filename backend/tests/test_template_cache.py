@@ -0,0 +1,28 @@
+import sqlite3
+from src.models.database import db
+from src.services.template_cache import template_cache
+
+def test_template_follows_template_activated_by_another_process(app, client, monkeypatch):
+    """El payload en cache se descarta cuando otra conexión (sin eventos del ORM) activa otra plantilla"""
+    monkeypatch.setattr(template_cache, 'check_interval', 0)
+    first = client.get('/api/survey/template')
+    old_id = first.get_json()['id']
+    assert client.get('/api/survey/template', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    
+    # Simula provision-template en otro proceso: SQL directo, sin pasar por la sesión
+    with app.app_context():
+        path = db.engine.url.database
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE survey_templates SET is_active = 0")
+        new_id = conn.execute(
+            "INSERT INTO survey_templates (title, version, is_active) VALUES ('Nueva', '2.0', 1)"
+        ).lastrowid
+    conn.close()
+    
+    try:
+        response = client.get('/api/survey/template', headers={'If-None-Match': first.headers['ETag']})
+        assert response.status_code == 200
+        assert response.get_json()['id'] == new_id != old_id
+    finally:
+        # El cache es global: no dejar la plantilla de esta base para las demás pruebas
+        template_cache.invalidate()
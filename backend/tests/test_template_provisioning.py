@@ -0,0 +1,32 @@
+import json
+from src.main import init_db
+from src.models.user import SurveyTemplate
+from src.services.template_provisioning import get_template_file, load_template_file, provision_template
+
+def write_version(tmp_path, version):
+    data = load_template_file(get_template_file())
+    data['version'] = version
+    path = tmp_path / f'template_{version}.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+def templates():
+    return [(t.id, t.version, t.is_active) for t in SurveyTemplate.query.order_by(SurveyTemplate.id)]
+
+def test_init_db_keeps_a_newer_published_version(app, tmp_path):
+    with app.app_context():
+        v2, created = provision_template(write_version(tmp_path, '2.0'))
+        assert created
+        
+        init_db()
+        
+        assert templates() == [(1, '1.0', False), (v2.id, '2.0', True)]
+
+def test_provisioning_an_old_version_reactivates_it(app, tmp_path):
+    with app.app_context():
+        provision_template(write_version(tmp_path, '2.0'))
+        
+        template, created = provision_template(write_version(tmp_path, '1.0'))
+        
+        assert (template.id, created) == (1, False)
+        assert templates() == [(1, '1.0', True), (2, '2.0', False)]
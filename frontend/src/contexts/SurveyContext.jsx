@@ -48,9 +48,9 @@ export const SurveyProvider = ({ children }) => {
     }
   }
 
-  const saveAnswer = async (questionId, answer) => {
+  const saveAnswers = async (answers) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/survey/answer`, {
+      const response = await fetch(`${API_BASE_URL}/api/survey/answers`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -58,13 +58,17 @@ export const SurveyProvider = ({ children }) => {
         },
         body: JSON.stringify({
           response_id: responseId,
-          question_id: questionId,
-          answer: answer
+          answers: Object.entries(answers).map(([questionId, answer]) => ({
+            question_id: Number(questionId),
+            answer: answer
+          }))
         })
       })
 
       const data = await response.json()
-      return response.ok ? { success: true } : { success: false, error: data.error }
+      return response.ok
+        ? { success: data.success, results: data.results }
+        : { success: false, error: data.error }
     } catch (error) {
       return { success: false, error: 'Error de conexión' }
     }
@@ -129,7 +133,7 @@ export const SurveyProvider = ({ children }) => {
     template,
     loading,
     startSurvey,
-    saveAnswer,
+    saveAnswers,
     completeSurvey,
     loadTemplate,
     resetSurvey
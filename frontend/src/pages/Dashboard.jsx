@@ -20,24 +20,13 @@ const Dashboard = () => {
           'Authorization': `Bearer ${token}`
         }
 
-        const [statsRes, satisfactionRes, hierarchyRes, issuesRes] = await Promise.all([
-          fetch('https://ogh5izcv8evq.manus.space/api/dashboard/stats', { headers }),
-          fetch('https://ogh5izcv8evq.manus.space/api/dashboard/satisfaction', { headers }),
-          fetch('https://ogh5izcv8evq.manus.space/api/dashboard/hierarchy', { headers }),
-          fetch('https://ogh5izcv8evq.manus.space/api/dashboard/issues', { headers })
-        ])
+        const response = await fetch('https://ogh5izcv8evq.manus.space/api/dashboard/overview', { headers })
+        const data = await response.json()
 
-        const [statsData, satisfactionData, hierarchyData, issuesData] = await Promise.all([
-          statsRes.json(),
-          satisfactionRes.json(),
-          hierarchyRes.json(),
-          issuesRes.json()
-        ])
-
-        setStats(statsData)
-        setSatisfaction(satisfactionData)
-        setHierarchy(hierarchyData)
-        setIssues(issuesData)
+        setStats(data.stats)
+        setSatisfaction(data.satisfaction)
+        setHierarchy(data.hierarchy)
+        setIssues(data.issues)
       } catch (error) {
         console.error('Error fetching dashboard data:', error)
       } finally {
@@ -75,8 +75,25 @@ const Reports = () => {
         }
       })
       
+      if (response.headers.get('Content-Type')?.startsWith('text/csv')) {
+        // CSV en streaming: descargar el cuerpo directamente
+        const blob = await response.blob()
+        const url = window.URL.createObjectURL(blob)
+        const a = document.createElement('a')
+        a.href = url
+        a.download = `reporte_${type}_${new Date().toISOString().split('T')[0]}.csv`
+        a.click()
+        window.URL.revokeObjectURL(url)
+        return
+      }
+      
       const data = await response.json()
       
+      if (!response.ok) {
+        alert(data.error || 'Error al exportar datos')
+        return
+      }
+      
       if (data.download_url) {
         // Simular descarga
         alert(`Archivo ${format.toUpperCase()} generado: ${data.download_url}`)
@@ -169,13 +186,9 @@ const Reports = () => {
                   </div>
 
                   <div className="flex space-x-4">
-                    <Button onClick={() => exportData('pdf', 'summary')}>
+                    <Button onClick={() => exportData('json', 'summary')}>
                       <Download className="mr-2" size={16} />
-                      Descargar PDF
-                    </Button>
-                    <Button variant="outline" onClick={() => exportData('excel', 'summary')}>
-                      <Download className="mr-2" size={16} />
-                      Descargar Excel
+                      Descargar JSON
                     </Button>
                   </div>
                 </div>
@@ -17,7 +17,7 @@ const Survey = () => {
     template, 
     loadTemplate, 
     startSurvey, 
-    saveAnswer, 
+    saveAnswers, 
     completeSurvey,
     loading 
   } = useSurvey()
@@ -46,30 +46,41 @@ const Survey = () => {
     }
   }
 
-  const handleSaveAnswer = async () => {
-    if (!currentAnswer.trim()) return
-
-    const currentSection = template.sections[Math.floor((currentStep - 1) / 3)]
-    const questionIndex = (currentStep - 1) % 3
-    const question = currentSection?.questions[questionIndex]
-
-    if (question) {
-      const result = await saveAnswer(question.id, currentAnswer)
-      if (result.success) {
-        setAnswers(prev => ({ ...prev, [question.id]: currentAnswer }))
-        setCurrentAnswer('')
-      } else {
-        alert('Error al guardar respuesta: ' + result.error)
-      }
-    }
+  // Pregunta y sección de un paso (los pasos empiezan en 1)
+  const locateStep = (step) => {
+    const totalQuestions = template.sections.reduce((total, section) => total + section.questions.length, 0)
+    const perSection = Math.ceil(totalQuestions / template.sections.length)
+    const section = template.sections[Math.floor((step - 1) / perSection)]
+    return { totalQuestions, section, question: section?.questions[(step - 1) % perSection] }
   }
 
   const handleNext = async () => {
-    await handleSaveAnswer()
+    const { totalQuestions, section, question } = locateStep(currentStep)
+    const nextAnswers = question && currentAnswer.trim()
+      ? { ...answers, [question.id]: currentAnswer }
+      : answers
+    setAnswers(nextAnswers)
     
-    const totalQuestions = template?.sections?.reduce((total, section) => total + section.questions.length, 0) || 0
+    // Las respuestas de la sección se guardan juntas al terminarla (una sola transacción)
+    const isLastStep = currentStep >= totalQuestions
+    if (isLastStep || locateStep(currentStep + 1).section !== section) {
+      const sectionAnswers = Object.fromEntries(
+        section.questions
+          .filter(sectionQuestion => nextAnswers[sectionQuestion.id] !== undefined)
+          .map(sectionQuestion => [sectionQuestion.id, nextAnswers[sectionQuestion.id]])
+      )
+      if (Object.keys(sectionAnswers).length > 0) {
+        const result = await saveAnswers(sectionAnswers)
+        if (!result.success) {
+          alert('Error al guardar respuestas: ' + (result.error || 'revisa las respuestas de esta sección'))
+          return
+        }
+      }
+    }
     
-    if (currentStep < totalQuestions) {
+    if (!isLastStep) {
+      const next = locateStep(currentStep + 1).question
+      setCurrentAnswer((next && nextAnswers[next.id]) || '')
       setCurrentStep(currentStep + 1)
     } else {
       const result = await completeSurvey()
@@ -83,6 +94,8 @@ const Survey = () => {
 
   const handlePrevious = () => {
     if (currentStep > 1) {
+      const previous = locateStep(currentStep - 1).question
+      setCurrentAnswer((previous && answers[previous.id]) || '')
       setCurrentStep(currentStep - 1)
     }
   }
@@ -216,14 +229,9 @@ const Survey = () => {
     )
   }
 
-  const totalQuestions = template.sections.reduce((total, section) => total + section.questions.length, 0)
+  const { totalQuestions, section: currentSection, question: currentQuestion } = locateStep(currentStep)
   const progress = (currentStep / totalQuestions) * 100
 
-  const currentSectionIndex = Math.floor((currentStep - 1) / Math.ceil(totalQuestions / template.sections.length))
-  const currentSection = template.sections[currentSectionIndex]
-  const questionIndex = (currentStep - 1) % Math.ceil(totalQuestions / template.sections.length)
-  const currentQuestion = currentSection?.questions[questionIndex]
-
   if (!currentQuestion) {
     return (
       <div className="container mx-auto px-4 py-8">